@@ -0,0 +1,182 @@
+"""
+Serial read-sizing benchmark over a pty-based virtual port (Linux/macOS).
+
+Compares the old fixed `ser.read(256)` loop with `read_serial_available`
+at several baud rates. A writer thread paces RTD frames on the master
+side of a pty at the line rate (10 bits per byte); the reader opens the
+slave side with pyserial exactly like `SerialReceiver` does. The frame
+sequence field carries the frame index so each decoded frame is matched
+to the moment its last byte was sent.
+
+Three traffic patterns are run at each baud rate:
+  quiet      - one running-time frame every 100 ms (a clock between races)
+  saturated  - the sample capture back to back at full line rate
+  burst      - the lane results of a heat (10 lane frames from the
+               capture) written in one go every 500 ms, as a USB adapter
+               or a busy reader delivers them, so several frames are
+               already queued when the reader asks for `in_waiting`
+
+Usage:
+    python bench_serial_read.py
+    python bench_serial_read.py --baud 9600 19200 115200 --seconds 5
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+
+from newScoreboard import RTDFrameDecoder, build_rtd_frame, read_serial_available
+
+PATTERNS = ("quiet", "saturated", "burst")
+# Lane frames per burst: a heat's results arrive together
+BURST_FRAMES = 10
+
+
+def quiet_frames(count):
+    """Running-time frames only, as the console sends while a clock runs."""
+    for i in range(count):
+        tenths = i % 10000
+        yield build_rtd_frame(0, b"%7d.%d " % (tenths // 10, tenths % 10), sequence=i)
+
+
+def capture_frames(path, count):
+    """Frames from a capture, renumbered so the sequence is the frame index."""
+    with open(path, "rb") as f:
+        frames = RTDFrameDecoder(capacity=65536).feed(f.read())
+    for i in range(count):
+        frame = frames[i % len(frames)]
+        yield build_rtd_frame(frame.offset, frame.payload, sequence=i, control=frame.control)
+
+
+def burst_frames(path, count):
+    """Lane-result frames (one 36-byte line each) from a capture, renumbered by index."""
+    with open(path, "rb") as f:
+        frames = [frame for frame in RTDFrameDecoder(capacity=65536).feed(f.read())
+                  if 222 <= frame.offset < 1000 and len(frame.payload) == 36]
+    for i in range(count):
+        frame = frames[i % len(frames)]
+        yield build_rtd_frame(frame.offset, frame.payload, sequence=i, control=frame.control)
+
+
+def _writer(fd, blocks, baud, interval, sent, stop):
+    """Write each block of frames with one write; frames are numbered across blocks."""
+    seconds_per_byte = 10.0 / baud
+    next_time = time.perf_counter()
+    i = 0
+    for block in blocks:
+        if stop.is_set():
+            break
+        raw = b"".join(block)
+        # The last byte of this block arrives after it has been clocked out
+        next_time += max(len(raw) * seconds_per_byte, interval)
+        delay = next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        os.write(fd, raw)
+        now = time.perf_counter()
+        for _ in block:
+            sent[i] = now
+            i += 1
+
+
+def run(strategy, baud, pattern, seconds, capture):
+    import serial
+
+    master, slave = os.openpty()
+    port = serial.Serial(os.ttyname(slave), baud, timeout=1)
+    seconds_per_byte = 10.0 / baud
+
+    if pattern == "quiet":
+        interval = 0.1
+        count = int(seconds / interval)
+        frames = list(quiet_frames(count))
+    elif pattern == "burst":
+        interval = 0.5
+        frames = list(burst_frames(capture, BURST_FRAMES * max(1, int(seconds / interval))))
+    else:
+        interval = 0.0
+        frames = []
+        total = 0.0
+        for raw in capture_frames(capture, 1 << 20):
+            total += len(raw) * seconds_per_byte
+            if total > seconds:
+                break
+            frames.append(raw)
+
+    sent = {}
+    received = {}
+    stop = threading.Event()
+    decoder = RTDFrameDecoder()
+    reads = 0
+    nbytes = 0
+
+    size = BURST_FRAMES if pattern == "burst" else 1
+    blocks = [frames[i:i + size] for i in range(0, len(frames), size)]
+    writer = threading.Thread(target=_writer, args=(master, blocks, baud, interval, sent, stop), daemon=True)
+    t0 = time.perf_counter()
+    writer.start()
+    deadline = t0 + seconds + 2.0
+    try:
+        while len(received) < len(frames) and time.perf_counter() < deadline:
+            if strategy == "fixed":
+                data = port.read(256)
+            else:
+                data = read_serial_available(port)
+            if not data:
+                continue
+            reads += 1
+            nbytes += len(data)
+            now = time.perf_counter()
+            for frame in decoder.feed(data):
+                received[int(frame.sequence)] = now
+    finally:
+        stop.set()
+        writer.join(timeout=2.0)
+        port.close()
+        os.close(master)
+        os.close(slave)
+    elapsed = time.perf_counter() - t0
+
+    latencies = [(received[i] - sent[i]) * 1000 for i in received if i in sent]
+    latencies.sort()
+    return {
+        "strategy": strategy,
+        "baud": baud,
+        "pattern": pattern,
+        "frames": len(frames),
+        "received": len(received),
+        "reads": reads,
+        "bytes_per_read": nbytes / reads if reads else 0.0,
+        "kb_per_s": nbytes / elapsed / 1000,
+        "median_ms": statistics.median(latencies) if latencies else float("nan"),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] if latencies else float("nan"),
+        "max_ms": latencies[-1] if latencies else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial read sizing over a pty")
+    parser.add_argument("--baud", type=int, nargs="+", default=[9600, 19200, 115200], help="Baud rates to emulate")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Traffic duration per run")
+    parser.add_argument("--capture", default="serial_log-12-27-2025-data-for-test.bin", help="Capture used for saturated and burst traffic")
+    parser.add_argument("--pattern", nargs="+", default=list(PATTERNS), choices=PATTERNS)
+    parser.add_argument("--strategy", nargs="+", default=["fixed", "adaptive"], choices=["fixed", "adaptive"])
+    args = parser.parse_args()
+
+    if not hasattr(os, "openpty"):
+        raise SystemExit("This benchmark needs a pty (Linux or macOS)")
+
+    print(f"{'strategy':9} {'baud':>6} {'pattern':9} {'frames':>11} {'reads':>6} {'B/read':>7} {'kB/s':>7} "
+          f"{'median ms':>10} {'p95 ms':>8} {'max ms':>8}")
+    for baud in args.baud:
+        for pattern in args.pattern:
+            for strategy in args.strategy:
+                r = run(strategy, baud, pattern, args.seconds, args.capture)
+                print(f"{r['strategy']:9} {r['baud']:6d} {r['pattern']:9} {r['received']:5d}/{r['frames']:<5d} "
+                      f"{r['reads']:6d} {r['bytes_per_read']:7.1f} {r['kb_per_s']:7.2f} "
+                      f"{r['median_ms']:10.2f} {r['p95_ms']:8.2f} {r['max_ms']:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Startup benchmark for the scoreboard executables.
+
+Launches each scoreboard with `python -X importtime ... --exit-after-paint`
+several times and reports:
+  - time to first paint: from process launch until the window has been
+    drawn and the scoreboard prints "first paint"
+  - total import time before the first paint, from -X importtime
+  - the slowest top-level imports, and whether pyserial was loaded
+
+Without a display the window cannot be drawn; the import figures are
+still reported (they cover everything imported before Tk starts).
+
+Usage:
+    python bench_startup.py
+    python bench_startup.py --runs 10 --top 8
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+TARGETS = {
+    "gbs-swim-scoreboard": ["gbs-swim-scoreboard.py", "--test-file", "serial_log-12-27-2025-data-for-test.bin"],
+    "scoreboard_ui": ["scoreboard_ui.py", "--demo"],
+}
+
+
+def parse_importtime(stderr):
+    """Return {top-level module: cumulative microseconds} from -X importtime output."""
+    top = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2]
+        # Nested imports are indented under the module that imported them
+        if name.startswith(" ") and not name.startswith("  "):
+            top[name.strip()] = top.get(name.strip(), 0) + int(parts[1])
+    return top
+
+
+def launch(script_args, timeout=30.0):
+    """One launch: (seconds to first paint or None, {module: import us})."""
+    cmd = [sys.executable, "-X", "importtime"] + script_args + ["--exit-after-paint"]
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    painted = None
+    for line in proc.stdout:
+        if line.strip() == "first paint":
+            painted = time.perf_counter() - t0
+    _, stderr = proc.communicate(timeout=timeout)
+    if painted is None:
+        print(f"  {script_args[0]} did not paint (exit {proc.returncode}): {stderr.strip().splitlines()[-1]}")
+    return painted, parse_importtime(stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure time to first paint and import time of the scoreboards")
+    parser.add_argument("--runs", type=int, default=5, help="Launches per scoreboard")
+    parser.add_argument("--top", type=int, default=5, help="Slowest top-level imports to list")
+    parser.add_argument("--target", nargs="+", choices=sorted(TARGETS), default=sorted(TARGETS))
+    args = parser.parse_args()
+
+    for name in args.target:
+        results = [launch(TARGETS[name]) for _ in range(args.runs)]
+        paints = [p * 1000 for p, _ in results if p is not None]
+        imports = {}
+        for _, modules in results:
+            for module, us in modules.items():
+                imports.setdefault(module, []).append(us / 1000)
+        total = [sum(modules.values()) / 1000 for _, modules in results]
+        if paints:
+            paint = (f"first paint median {statistics.median(paints):.0f} ms "
+                     f"(min {min(paints):.0f}, max {max(paints):.0f})")
+        else:
+            paint = "first paint n/a"
+        print(f"{name}: {paint}, "
+              f"imports {statistics.median(total):.1f} ms, "
+              f"pyserial {'loaded' if 'serial' in imports else 'not loaded'}")
+        slowest = sorted(imports.items(), key=lambda kv: statistics.median(kv[1]), reverse=True)
+        for module, ms in slowest[:args.top]:
+            print(f"    {statistics.median(ms):7.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
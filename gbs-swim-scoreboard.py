@@ -1,16 +1,94 @@
 import tkinter as tk
 from tkinter import font
-import serial
 import threading
 import sys
 import time
 import argparse
+import heapq
+import itertools
+import queue
+
+from hot_reload import TemplateWatcher, load_display_config
+from long_session import DEFAULT_LOG_BACKUPS, DEFAULT_LOG_MAX_BYTES, ConsoleLimiter, LatencyStats, RotatingCaptureLog
+from newScoreboard import RTDFrameDecoder, read_serial_available, sequence_age
 
 LANE_COUNT = 8
 
+# Per-frame console messages; --long-session swaps in a ConsoleLimiter
+log = print
+
+def lane_field_keys(lane_count):
+    # ITF field names per lane, built once rather than for every frame
+    return [
+        (lane, f'Line {lane} Swimmer Name', f'Line {lane} Team Name',
+         f'Line {lane} Split/Finish Time', f'Line {lane} Place Number')
+        for lane in range(1, lane_count+1)
+    ]
+
+# How long a heat change may wait for the next heat's header frames. The
+# console sends the lane lines first; the event/heat frame follows the
+# clock reset by about 1.3 s in the sample capture.
+TRANSITION_MS = 1500
+
+class HeatTransition:
+    """
+    Stages the board for the next heat instead of clearing it in place.
+
+    When the clock resets to 0.0 the blank board is built here, off
+    screen, and the next heat's event name, event/heat numbers and lane
+    frames are written into it as they arrive. Everything is applied to
+    the widgets in one batch when the event/heat frame arrives or after
+    `deadline_ms`, whichever comes first, so the board goes straight from
+    the old heat to the new one with a single repaint.
+    """
+    def __init__(self, board, deadline_ms=TRANSITION_MS):
+        self.board = board
+        self.deadline_ms = deadline_ms
+        self.staged = None
+        self.commits = 0
+        self._timer = None
+
+    @property
+    def active(self):
+        return self.staged is not None
+
+    def begin(self):
+        if self.staged is not None:
+            # Both clock fields reset to 0.0; keep what is already staged
+            return
+        self.staged = {
+            'event_name': '',
+            'event': '',
+            'heat': 'Heat: ',
+            'lanes': {lane: {'name': '-', 'time': '-', 'place': '-'} for lane in range(1, self.board.lane_count+1)},
+        }
+        self._timer = self.board.after(self.deadline_ms, self.commit)
+
+    def update_lane(self, lane, **fields):
+        staged = self.staged['lanes'].get(lane)
+        if staged is not None:
+            staged.update((k, v) for k, v in fields.items() if v is not None)
+
+    def commit(self):
+        if self.staged is None:
+            return
+        if self._timer is not None:
+            self.board.after_cancel(self._timer)
+            self._timer = None
+        staged, self.staged = self.staged, None
+        board = self.board
+        board.set_text(board.event_name_label, staged['event_name'])
+        board.set_text(board.event_label, staged['event'])
+        board.set_text(board.heat_label, staged['heat'])
+        for lane, fields in staged['lanes'].items():
+            board.update_lane(lane, **fields)
+        self.commits += 1
+
 class SwimScoreboard(tk.Tk):
-    def __init__(self):
+    def __init__(self, lane_count=LANE_COUNT, transition_ms=TRANSITION_MS):
         super().__init__()
+        self.lane_count = lane_count
+        self.transition = HeatTransition(self, transition_ms) if transition_ms > 0 else None
         self.title("Swim Scoreboard")
         self.configure(bg="#ffffff")
         self.geometry("700x500")
@@ -63,11 +141,15 @@ class SwimScoreboard(tk.Tk):
         header_frame.grid_columnconfigure(4, weight=1)
 
         # Lane rows
-        self.lane_rows = []
-        self.lane_row_frames = []
         self.lane_rows_container = tk.Frame(self, bg="#ffffff")
         self.lane_rows_container.pack(fill="both", expand=True)
-        for lane in range(1, LANE_COUNT+1):
+        self._build_lane_rows()
+
+    def _build_lane_rows(self):
+        self.lane_rows = []
+        self.lane_row_frames = []
+        self.lane_field_keys = lane_field_keys(self.lane_count)
+        for lane in range(1, self.lane_count+1):
             row_frame = tk.Frame(self.lane_rows_container, bg="#ffffff", highlightbackground="#e6e6e6", highlightthickness=2)
             row_frame.grid(row=lane-1, column=0, sticky="nsew", padx=40, pady=0)
             lane_label = tk.Label(row_frame, text=str(lane), font=self.custom_font, fg="#002366", bg="#ffffff", width=6)
@@ -89,6 +171,29 @@ class SwimScoreboard(tk.Tk):
             self.lane_row_frames.append(row_frame)
         self.lane_rows_container.grid_columnconfigure(0, weight=1)
 
+    def set_lane_count(self, lane_count):
+        """Rebuild the lane rows for a new lane count, keeping what the lanes already show."""
+        if lane_count == self.lane_count:
+            return
+        shown = [tuple(label.cget("text") for label in row) for row in self.lane_rows]
+        for row_frame in self.lane_row_frames:
+            row_frame.destroy()
+        self.lane_count = lane_count
+        self._build_lane_rows()
+        for lane, (name, team, time, place) in enumerate(shown[:lane_count], start=1):
+            self.update_lane(lane, name=name, team=team, time=time, place=place)
+        self._on_resize(None)
+
+    def reload_layout(self, lane_count, parser):
+        """Install a reloaded lane count and ITF parser without touching the serial session."""
+        self.set_lane_count(lane_count)
+        if parser is not None:
+            self.frame_parser = parser
+            receiver = getattr(self, 'serial_receiver', None)
+            if isinstance(receiver, SerialReceiver):
+                # A single attribute swap; the reader picks it up at the next frame
+                receiver.parser = parser
+
     def _update_clock(self):
         import time
         now = time.time()
@@ -104,17 +209,22 @@ class SwimScoreboard(tk.Tk):
     def update_heat(self, heat_num):
         self.heat_label.config(text=f"Heat: {heat_num}")
 
+    def set_text(self, label, text):
+        # Re-setting the same text still makes Tk lay out and redraw the label
+        if label.cget("text") != text:
+            label.config(text=text)
+
     def update_lane(self, lane, name=None, team=None, time=None, place=None):
-        if 1 <= lane <= LANE_COUNT:
+        if 1 <= lane <= self.lane_count:
             name_label, team_label, time_label, place_label = self.lane_rows[lane-1]
             if name is not None:
-                name_label.config(text=name)
+                self.set_text(name_label, name)
             if team is not None:
-                team_label.config(text=team)
+                self.set_text(team_label, team)
             if time is not None:
-                time_label.config(text=time)
+                self.set_text(time_label, time)
             if place is not None:
-                place_label.config(text=place)
+                self.set_text(place_label, place)
 
     def _on_resize(self, event):
         # Calculate new font size to fill row height as much as possible
@@ -123,7 +233,7 @@ class SwimScoreboard(tk.Tk):
         if hasattr(self, 'lane_rows_container'):
             container_height = self.lane_rows_container.winfo_height()
             if container_height > 0:
-                row_height = int(container_height / LANE_COUNT)
+                row_height = int(container_height / self.lane_count)
                 # Try to fill the row height with the font (approximate, as font metrics vary)
                 # Use 0.8 as a scaling factor to fill most of the row
                 font_size = int(min(max_font, max(min_font, row_height * 0.5)))
@@ -133,76 +243,235 @@ class SwimScoreboard(tk.Tk):
                 for row_frame in self.lane_row_frames:
                     row_frame.configure(height=row_height)
 
-    def start_serial(self, port='COM1', baudrate=19200, itf_path='OS2-Swimming.itf', test_file=None):
-        parser = OS2FrameParser(itf_path)
-        def on_frame(frame):
-            # Update event and heat
-            event_num = frame.get('Event Number', '').strip()
-            heat_num = frame.get('Heat Number', '').strip()
-            event_name = frame.get('Event Title Line 1', '').strip()
+    def track_latency(self, stats, report_interval=5000):
+        """
+        Time frames stamped by rtd_simulator.py from send to decode and to
+        paint. Only meaningful for simulator traffic: the real console
+        leaves the sequence field at zero.
+        """
+        self.latency = stats
+        def report():
+            print(stats.summary())
+            self.after(report_interval, report)
+        self.after(report_interval, report)
+
+    def _frame_decoded(self, sequence):
+        # Called on the reader thread right after the frame was dispatched
+        self.latency.add("decode", sequence_age(sequence))
+        self.after(0, self._frame_dispatched, sequence)
+
+    def _frame_dispatched(self, sequence):
+        # Queued behind this frame's update, whose redraws are now pending
+        # as idle tasks; an idle callback scheduled now runs after them.
+        self.after_idle(lambda: self.latency.add("paint", sequence_age(sequence)))
+
+    def on_frame(self, frame):
+        # Update event and heat
+        event_num = frame.get('Event Number', '').strip()
+        heat_num = frame.get('Heat Number', '').strip()
+        event_name = frame.get('Event Title Line 1', '').strip()
+        if event_num:
+            self.event_label.config(text=event_num)
+        if heat_num:
+            self.heat_label.config(text=f"Heat: {heat_num}")
+        if event_name:
+            self.event_name_label.config(text=event_name)
+        # Update lanes
+        for lane, name_key, team_key, time_key, place_key in self.lane_field_keys:
+            name = frame.get(name_key, '')
+            team = frame.get(team_key, '')
+            time = frame.get(time_key, '')
+            place = frame.get(place_key, '')
+            self.update_lane(lane, name=name, team=team, time=time, place=place)
+
+    def on_data(self, data):
+        # Tk thread: one field update, told apart by its payload length
+        # print(f"on_data called with data: {data}, len={len(data)}")
+        if len(data) == 9:
+            time = data.strip()
+            if (time != '0.00'):
+                self.clock_label.config(text=f"Time: {data.strip()}")
+            if (time == '0.0'): # Start of new race, clear scoreboard data
+                log("New event detected: Resetting scoreboard")
+                log(f"{'-'*66}")
+                if self.transition:
+                    # Cleared off screen; shown with the next heat's header
+                    self.transition.begin()
+                    return
+                self.event_name_label.config(text="")
+                self.event_label.config(text="")
+                self.heat_label.config(text="Heat: ")
+                for lane in range(1, self.lane_count+1):
+                    self.update_lane(lane, name="-", time="-", place="-")
+        elif len(data) == 29: # Event[4],Heat[2],Notused[21],Length=[2]
+            log(f"Received event info update: '{data}'")
+            event_num = data[0:4].strip()
+            heat_num = data[4:6].strip()
+            # print(f"Process event/heat/time update: event={event_num}, heat={heat_num}")
+            if self.transition and self.transition.active:
+                if event_num:
+                    self.transition.staged['event'] = event_num
+                if heat_num:
+                    self.transition.staged['heat'] = f"Heat: {heat_num}"
+                # The header is complete; show the new heat in one go
+                self.transition.commit()
+                return
             if event_num:
                 self.event_label.config(text=event_num)
             if heat_num:
                 self.heat_label.config(text=f"Heat: {heat_num}")
-            if event_name:
+        elif len(data) == 30: # Event name update
+            event_name = data.strip()
+            log(f"Received event name update: '{data}'")
+            # Only update if existing event name is not blank
+            if self.transition and self.transition.active:
+                if not self.transition.staged['event_name']:
+                    self.transition.staged['event_name'] = event_name
+                return
+            if not self.event_name_label.cget("text"):
                 self.event_name_label.config(text=event_name)
-            # Update lanes
-            for lane in range(1, LANE_COUNT+1):
-                name = frame.get(f'Line {lane} Swimmer Name', '')
-                team = frame.get(f'Line {lane} Team Name', '')
-                time = frame.get(f'Line {lane} Split/Finish Time', '')
-                place = frame.get(f'Line {lane} Place Number', '')
-                self.update_lane(lane, name=name, team=team, time=time, place=place)
-        def on_data(data):
-            # print(f"on_data called with data: {data}, len={len(data)}")
-            if len(data) == 9:
-                time = data.strip()
-                if (time != '0.00'):
-                    self.clock_label.config(text=f"Time: {data.strip()}")
-                if (time == '0.0'): # Start of new race, clear scoreboard data
-                    print("New event detected: Resetting scoreboard")
-                    print(f"{'-'*66}")
-                    self.event_name_label.config(text="")
-                    self.event_label.config(text="")
-                    self.heat_label.config(text="Heat: ")
-                    for lane in range(1, LANE_COUNT+1):
-                        self.update_lane(lane, name="-", time="-", place="-")
-            elif len(data) == 29: # Event[4],Heat[2],Notused[21],Length=[2]
-                print(f"Received event info update: '{data}'")
-                event_num = data[0:4].strip()
-                heat_num = data[4:6].strip()
-                # print(f"Process event/heat/time update: event={event_num}, heat={heat_num}")
-                if event_num:
-                    self.event_label.config(text=event_num)
-                if heat_num:
-                    self.heat_label.config(text=f"Heat: {heat_num}")
-            elif len(data) == 30: # Event name update
-                event_name = data.strip()
-                print(f"Received event name update: '{data}'")
-                # Only update if existing event name is not blank
-                if not self.event_name_label.cget("text"):
-                    self.event_name_label.config(text=event_name)
-            elif len(data) == 36: # Name[15],Team[5],Lane[2],Place[3],Split/FinishTime[9],Completed[2]
-                print(f"Received lane update data: '{data}'")
-                name = data[0:15].strip()
-                # name = name if name else None
-                team = data[15:20].strip()
-                lane = data[20:22].strip()
-                lane = int(lane) if lane.isdigit() else None
-                place = data[22:25].strip()
-                # place = place if place else None
-                time = data[25:34].strip()
-                # time = time if time and time != '0.00' else None
-                time = time if time != '0.00' else None
-                # print(f"Process lane update: lane={lane}, name={name}, place={place}, time={time}")
-                if (lane is not None):
+        elif len(data) == 36: # Name[15],Team[5],Lane[2],Place[3],Split/FinishTime[9],Completed[2]
+            log(f"Received lane update data: '{data}'")
+            name = data[0:15].strip()
+            # name = name if name else None
+            team = data[15:20].strip()
+            lane = data[20:22].strip()
+            lane = int(lane) if lane.isdigit() else None
+            place = data[22:25].strip()
+            # place = place if place else None
+            time = data[25:34].strip()
+            # time = time if time and time != '0.00' else None
+            time = time if time != '0.00' else None
+            # print(f"Process lane update: lane={lane}, name={name}, place={place}, time={time}")
+            if (lane is not None):
+                if self.transition and self.transition.active:
+                    self.transition.update_lane(lane, name=name, team=team, time=time, place=place)
+                else:
                     self.update_lane(lane, name=name, team=team, time=time, place=place)
-            else:
-                print(f"Unprocessed data ({len(data)}): '{data}'")
+        else:
+            log(f"Unprocessed data ({len(data)}): '{data}'")
 
-        self.serial_receiver = SerialReceiver(port, baudrate, parser, lambda frame: self.after(0, on_frame, frame), lambda data: self.after(0, on_data, data), test_file=test_file)
+    def start_serial(self, port='COM1', baudrate=19200, itf_path='OS2-Swimming.itf', test_file=None, sources=None, capture_log=None, replay_delay=0.001):
+        parser = OS2FrameParser(itf_path)
+        self.frame_parser = parser
+        on_decoded = self._frame_decoded if getattr(self, 'latency', None) else None
+        if sources:
+            # Several consoles/feeds at once, all serviced from one thread
+            from rtd_sources import SourceManager, make_source
+            def on_source_frame(source, frame, changes):
+                parser = self.frame_parser
+                if len(frame.payload) == parser.frame_length:
+                    self.after(0, self.on_frame, parser.parse_frame(frame.payload))
+                else:
+                    self.after(0, self.on_data, frame.payload.decode(errors='ignore'))
+                if on_decoded:
+                    on_decoded(frame.sequence)
+            # Looked up per call so --long-session's limiter applies
+            self.serial_receiver = SourceManager(on_source_frame, log=lambda *args: log(*args))
+            for spec in sources:
+                # No template state: frames are decoded here with self.frame_parser
+                self.serial_receiver.add(make_source(spec, baudrate=baudrate, default_itf=None))
+            self.serial_receiver.start()
+            return
+        self.serial_receiver = SerialReceiver(port, baudrate, parser, lambda frame: self.after(0, self.on_frame, frame), lambda data: self.after(0, self.on_data, data), test_file=test_file, on_decoded=on_decoded, capture_log=capture_log, replay_delay=replay_delay)
         self.serial_receiver.start()
 
+class _HeadlessLabel:
+    def __init__(self, text=""):
+        self.text = text
+
+    def cget(self, key):
+        return self.text
+
+    def config(self, text):
+        self.text = text
+
+class HeadlessScoreboard:
+    """
+    SwimScoreboard's board logic without a window, for --headless replays
+    (e.g. profiling on a machine with no display). Labels only hold their
+    text; after() and after_idle() callbacks are run by run() on the
+    calling thread in place of the Tk main loop.
+    """
+    set_text = SwimScoreboard.set_text
+    update_lane = SwimScoreboard.update_lane
+    on_frame = SwimScoreboard.on_frame
+    on_data = SwimScoreboard.on_data
+    _frame_decoded = SwimScoreboard._frame_decoded
+    _frame_dispatched = SwimScoreboard._frame_dispatched
+    start_serial = SwimScoreboard.start_serial
+
+    def __init__(self, lane_count=LANE_COUNT, transition_ms=TRANSITION_MS):
+        self.lane_count = lane_count
+        self.transition = HeatTransition(self, transition_ms) if transition_ms > 0 else None
+        self.event_name_label = _HeadlessLabel()
+        self.event_label = _HeadlessLabel("1")
+        self.heat_label = _HeadlessLabel("Heat: 1")
+        self.clock_label = _HeadlessLabel()
+        self.lane_rows = [
+            (_HeadlessLabel(f"Swimmer {lane}"), _HeadlessLabel("-"), _HeadlessLabel("-"), _HeadlessLabel("-"))
+            for lane in range(1, lane_count+1)
+        ]
+        self.lane_field_keys = lane_field_keys(lane_count)
+        # (due, id, func, args) from any thread; timers wait in a heap
+        self.callbacks = queue.Queue()
+        self.timers = []
+        # Ids not yet run; cancelling anything else is a no-op, as in Tk
+        self.pending = set()
+        self.cancelled = set()
+        self._ids = itertools.count(1)
+
+    def after(self, ms, func, *args):
+        timer_id = next(self._ids)
+        self.pending.add(timer_id)
+        self.callbacks.put((time.monotonic() + ms / 1000, timer_id, func, args))
+        return timer_id
+
+    def after_idle(self, func, *args):
+        return self.after(0, func, *args)
+
+    def after_cancel(self, timer_id):
+        if timer_id in self.pending:
+            self.cancelled.add(timer_id)
+
+    def _call(self, timer_id, func, args):
+        self.pending.discard(timer_id)
+        if timer_id in self.cancelled:
+            self.cancelled.discard(timer_id)
+            return
+        func(*args)
+
+    def run_pending(self):
+        """Run the callbacks that are due now without waiting; later timers stay queued."""
+        while True:
+            try:
+                heapq.heappush(self.timers, self.callbacks.get_nowait())
+            except queue.Empty:
+                break
+        now = time.monotonic()
+        while self.timers and self.timers[0][0] <= now:
+            _, timer_id, func, args = heapq.heappop(self.timers)
+            self._call(timer_id, func, args)
+
+    def run(self, done):
+        """Run callbacks until done() is true and nothing is left pending."""
+        while True:
+            now = time.monotonic()
+            while self.timers and self.timers[0][0] <= now:
+                _, timer_id, func, args = heapq.heappop(self.timers)
+                self._call(timer_id, func, args)
+            timeout = max(self.timers[0][0] - now, 0) if self.timers else 0.05
+            try:
+                due, timer_id, func, args = self.callbacks.get(timeout=timeout)
+            except queue.Empty:
+                if done() and not self.timers and self.callbacks.empty():
+                    return
+                continue
+            if due > time.monotonic():
+                heapq.heappush(self.timers, (due, timer_id, func, args))
+            else:
+                self._call(timer_id, func, args)
+
 class OS2FrameParser:
     def __init__(self, itf_path):
         self.fields = self._parse_itf(itf_path)
@@ -244,18 +513,29 @@ class OS2FrameParser:
             length = field['LENGTH']
             name = field['NAME']
             result[name] = data[idx:idx+length].decode(errors='ignore').strip()
-            print(f"Parsed field {name}: {result[name]}")
+            log(f"Parsed field {name}: {result[name]}")
             idx += length
         return result
 
 class SerialReceiver:
-    def __init__(self, port, baudrate, parser, on_frame, on_data, test_file=None):
+    def __init__(self, port, baudrate, parser, on_frame, on_data, test_file=None, on_decoded=None, capture_log=None, replay_delay=0.001):
         self.test_file = test_file
+        # Pause after each test-file byte; 0 replays as fast as possible
+        self.replay_delay = replay_delay
         if not test_file:
+            # Imported here so --test-file and --source runs never load pyserial
+            import serial
             self.ser = serial.Serial(port, baudrate, timeout=1)
         self.parser = parser
         self.on_frame = on_frame
         self.on_data = on_data
+        # Optional on_decoded(sequence) after each frame is handed on
+        self.on_decoded = on_decoded
+        # Where raw bytes are recorded; defaults to appending to serial_log.bin
+        self.capture_log = capture_log
+        # Fixed-size buffer; resyncs on the next valid header after noise
+        self.decoder = RTDFrameDecoder()
+        self.reported_discarded = 0
         self.thread = threading.Thread(target=self._read_loop, daemon=True)
         self.running = False
 
@@ -268,11 +548,29 @@ class SerialReceiver:
         if hasattr(self, 'ser'):
             self.ser.close()
 
+    def _handle_bytes(self, data):
+        frames = self.decoder.feed(data)
+        # Report a burst of noise once, when the stream is back in sync
+        if frames and self.decoder.bytes_discarded != self.reported_discarded:
+            lost = self.decoder.bytes_discarded - self.reported_discarded
+            self.reported_discarded = self.decoder.bytes_discarded
+            log(f"Resynced after discarding {lost} bytes (total {self.reported_discarded}, bad frames {self.decoder.bad_frames})")
+        for frame in frames:
+            payload = frame.payload
+            parser = self.parser
+            if len(payload) == parser.frame_length:
+                try:
+                    parsed = parser.parse_frame(payload)
+                    self.on_frame(parsed)
+                except Exception as e:
+                    log(f"Frame parse error: {e}")
+            else:
+                self.on_data(payload.decode(errors='ignore'))
+            if self.on_decoded:
+                self.on_decoded(frame.sequence)
+
     def _read_loop(self):
-        buffer = b''
-        STX = 0x02
-        ETX = 0x04
-        with open('serial_log.bin', 'ab') as log_file:
+        with self.capture_log or RotatingCaptureLog('serial_log.bin') as log_file:
             if self.test_file:
                 with open(self.test_file, 'rb') as f:
                     while self.running:
@@ -280,58 +578,22 @@ class SerialReceiver:
                         if not byte:
                             break
                         log_file.write(byte)
-                        log_file.flush()
-                        buffer += byte
-                        time.sleep(0.001)
-                        while True:
-                            start = buffer.find(bytes([STX]))
-                            end = buffer.find(bytes([ETX]), start + 1)
-                            if start != -1 and end != -1 and end > start:
-                                frame = buffer[start + 1:end]
-                                buffer = buffer[end + 1:]
-                                if len(frame) == self.parser.frame_length:
-                                    try:
-                                        parsed = self.parser.parse_frame(frame)
-                                        self.on_frame(parsed)
-                                    except Exception as e:
-                                        print(f"Frame parse error: {e}")
-                                else:
-                                    temp = frame.decode(errors='ignore')
-                                    self.on_data(temp)
-                            else:
-                                if len(buffer) > 4096:
-                                    buffer = buffer[-4096:]
-                                break
+                        if self.replay_delay:
+                            # A fast replay is flushed when the log is closed
+                            log_file.flush()
+                            time.sleep(self.replay_delay)
+                        self._handle_bytes(byte)
             else:
                 while self.running:
                     try:
-                        data = self.ser.read(256)
+                        data = read_serial_available(self.ser)
                         if not data:
                             continue
                         log_file.write(data)
                         log_file.flush()
-                        buffer += data
-                        while True:
-                            start = buffer.find(bytes([STX]))
-                            end = buffer.find(bytes([ETX]), start + 1)
-                            if start != -1 and end != -1 and end > start:
-                                frame = buffer[start + 1:end]
-                                buffer = buffer[end + 1:]
-                                if len(frame) == self.parser.frame_length:
-                                    try:
-                                        parsed = self.parser.parse_frame(frame)
-                                        self.on_frame(parsed)
-                                    except Exception as e:
-                                        print(f"Frame parse error: {e}")
-                                else:
-                                    temp = frame.decode(errors='ignore')
-                                    self.on_data(temp)
-                            else:
-                                if len(buffer) > 4096:
-                                    buffer = buffer[-4096:]
-                                break
+                        self._handle_bytes(data)
                     except Exception as e:
-                        print(f"Serial read error: {e}")
+                        log(f"Serial read error: {e}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Swim Scoreboard")
@@ -339,11 +601,103 @@ if __name__ == "__main__":
     parser.add_argument('--port', type=str, default='COM23', help='Serial port to use (default: COM23)')
     parser.add_argument('--baudrate', type=int, default=19200, help='Serial baudrate (default: 19200)')
     parser.add_argument('--itf', type=str, default='', help='ITF file path (default: None)')
+    parser.add_argument('--source', action='append', default=[], help='RTD source as kind:address[@group] (serial:COM23, udp:21003, file:capture.bin); the template comes from --itf/--config. Repeat for several feeds; give redundant feeds of one console the same @group. Overrides --port/--test-file')
+    parser.add_argument('--config', type=str, help='Display config (INI with [display] lane_count, itf); edits to it or to the ITF are applied without restarting')
+    parser.add_argument('--latency', action='store_true', help='Report send-to-decode and send-to-paint latency of frames from rtd_simulator.py')
+    parser.add_argument('--long-session', action='store_true', help='Bound memory and disk for an all-day meet: rotate serial_log.bin and rate-limit console output')
+    parser.add_argument('--log-max-mb', type=float, default=DEFAULT_LOG_MAX_BYTES / 2**20, help='With --long-session, roll serial_log.bin over at this size in MB (default: %(default)g)')
+    parser.add_argument('--log-backups', type=int, default=DEFAULT_LOG_BACKUPS, help=f'With --long-session, rotated serial logs to keep (default: {DEFAULT_LOG_BACKUPS})')
+    parser.add_argument('--transition-ms', type=int, default=TRANSITION_MS, help=f'At a heat change, wait up to this long for the new heat header before redrawing the board in one step; 0 clears it immediately (default: {TRANSITION_MS})')
+    parser.add_argument('--exit-after-paint', action='store_true', help='Print "first paint" once the window is drawn and exit (used by bench_startup.py)')
+    parser.add_argument('--profile', nargs='?', const='gbs-profile.folded', metavar='PATH', help='Sample the reader thread and the main loop; write folded stacks for a flame graph to PATH at exit (default: gbs-profile.folded)')
+    parser.add_argument('--headless', action='store_true', help='Run the board logic without a window (needs --test-file or --source); exits when the replay ends')
+    parser.add_argument('--replay-delay-ms', type=float, default=1.0, help='Pause after each --test-file byte in ms; 0 replays as fast as possible (default: 1)')
     args = parser.parse_args()
 
-    app = SwimScoreboard()
-    try:
-        app.start_serial(port=args.port, baudrate=args.baudrate, itf_path=args.itf, test_file=args.test_file)
-    except Exception as e:
-        print(f"Error starting serial: {e}")
+    config = load_display_config(args.config, default_itf=args.itf)
+    if args.source:
+        # The board decodes every source with the one swim template from --itf/--config
+        from rtd_sources import parse_source_spec
+        for spec in args.source:
+            try:
+                source_itf = parse_source_spec(spec)[2]
+            except ValueError as e:
+                parser.error(str(e))
+            if source_itf:
+                parser.error(f"--source {spec}: per-source ITF files are not supported by this board; "
+                             f"set the template with --itf or --config, or use scoreboard_ui.py for other sports")
+
+    capture_log = None
+    if args.long_session:
+        log = ConsoleLimiter()
+        capture_log = RotatingCaptureLog('serial_log.bin', max_bytes=int(args.log_max_mb * 1024 * 1024), backups=args.log_backups)
+
+    profiler = None
+    if args.profile:
+        from sampling_profiler import SamplingProfiler
+        profiler = SamplingProfiler()
+        profiler.watch(threading.main_thread(), 'main loop')
+        profiler.start()
+
+    if args.headless:
+        if not (args.test_file or args.source):
+            parser.error('--headless needs --test-file or --source')
+        board = HeadlessScoreboard(lane_count=config['lane_count'], transition_ms=args.transition_ms)
+        started = time.perf_counter()
+        board.start_serial(port=args.port, baudrate=args.baudrate, itf_path=config['itf'], test_file=args.test_file,
+                           sources=args.source, capture_log=capture_log, replay_delay=args.replay_delay_ms / 1000)
+        if profiler:
+            profiler.watch(board.serial_receiver.thread, 'reader')
+        try:
+            board.run(lambda: not board.serial_receiver.thread.is_alive())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            board.serial_receiver.stop()
+            print(f"Headless replay finished in {time.perf_counter() - started:.1f} s")
+            if profiler:
+                profiler.finish(args.profile)
+        sys.exit(0)
+
+    app = SwimScoreboard(lane_count=config['lane_count'], transition_ms=args.transition_ms)
+    # Draw the empty board before anything slow (ITF parsing, opening the port)
+    app.update()
+    if args.exit_after_paint:
+        print("first paint", flush=True)
+        app.destroy()
+        sys.exit(0)
+    if args.latency:
+        app.track_latency(LatencyStats())
+
+    def start_serial():
+        # Off the Tk thread; frames reach the window through app.after()
+        try:
+            app.start_serial(port=args.port, baudrate=args.baudrate, itf_path=config['itf'], test_file=args.test_file, sources=args.source,
+                             capture_log=capture_log, replay_delay=args.replay_delay_ms / 1000)
+            if profiler:
+                profiler.watch(app.serial_receiver.thread, 'reader')
+        except Exception as e:
+            print(f"Error starting serial: {e}")
+    threading.Thread(target=start_serial, daemon=True).start()
+
+    if args.config:
+        def build_layout():
+            # Compiled on the watcher thread; only the swap happens on the Tk thread
+            cfg = load_display_config(args.config, default_itf=args.itf)
+            frame_parser = None
+            if cfg['itf']:
+                frame_parser = OS2FrameParser(cfg['itf'])
+                if not frame_parser.fields:
+                    raise ValueError(f"no fields in {cfg['itf']}")
+            return cfg['lane_count'], frame_parser
+        watcher = TemplateWatcher(
+            lambda: [args.config, load_display_config(args.config, default_itf=args.itf)['itf']],
+            build_layout,
+            lambda built: app.after(0, app.reload_layout, *built),
+        )
+        watcher.start()
     app.mainloop()
+    if args.latency:
+        print(app.latency.summary())
+    if profiler:
+        profiler.finish(args.profile)
@@ -0,0 +1,119 @@
+"""
+Hot reload of ITF templates and display configuration.
+
+A `TemplateWatcher` polls the modification time of the ITF and the
+display config file. When either changes (and has stopped changing for
+one poll interval, so a half-saved file is not picked up) it calls
+`build()` on its own thread to compile the new layout, then hands the
+result to `install()`. The serial session is never touched: the owner
+swaps the compiled layout in between frames and keeps its board state.
+
+The display config is a small INI file, e.g. `scoreboard.ini`:
+
+    [display]
+    lane_count = 6
+    itf = OS2-Swimming.itf
+"""
+import configparser
+import os
+import threading
+
+DEFAULT_LANE_COUNT = 8
+
+
+def load_display_config(path, default_itf="OS2-Swimming.itf", default_lanes=DEFAULT_LANE_COUNT):
+    """
+    Read `[display]` settings from `path`. Returns a dict with `itf` and
+    `lane_count`; missing file or keys fall back to the defaults.
+    """
+    config = {"itf": default_itf, "lane_count": default_lanes}
+    if not path or not os.path.exists(path):
+        return config
+    parser = configparser.ConfigParser()
+    parser.read(path, encoding="utf-8")
+    if parser.has_section("display"):
+        section = parser["display"]
+        config["itf"] = section.get("itf", default_itf) or default_itf
+        lanes = section.getint("lane_count", default_lanes)
+        if lanes < 1:
+            raise ValueError(f"lane_count must be at least 1, got {lanes}")
+        config["lane_count"] = lanes
+    return config
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class TemplateWatcher:
+    """
+    Polls `paths()` every `interval` seconds. On a settled change calls
+    `build()` in the watcher thread and passes its result to
+    `install(result)`. If `paths()`, `build()` or `install()` raises
+    (e.g. a half-edited config), the error is printed, the current layout
+    stays in place and watching goes on with the last good paths, so the
+    next valid edit is still picked up.
+
+    `paths` is a callable because the ITF path itself can change when
+    the display config is edited.
+    """
+
+    def __init__(self, paths, build, install, interval=1.0):
+        self.paths = paths
+        self.build = build
+        self.install = install
+        self.interval = interval
+        self.reloads = 0
+        self._paths = []
+        self._paths_error = None
+        self._stop = threading.Event()
+        self._seen = self._snapshot()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _snapshot(self):
+        try:
+            self._paths = [p for p in self.paths() if p]
+            self._paths_error = None
+        except Exception as e:
+            # Printed once per distinct error, not on every poll
+            if str(e) != self._paths_error:
+                print(f"Could not read watched paths, still watching {', '.join(self._paths) or 'nothing'}: {e}")
+                self._paths_error = str(e)
+        return {p: _stat(p) for p in self._paths}
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def check(self):
+        """Reload now if anything changed since the last check. Returns True if reloaded."""
+        current = self._snapshot()
+        if current == self._seen:
+            return False
+        # Wait for the editor to finish writing before compiling
+        self._stop.wait(self.interval)
+        settled = self._snapshot()
+        if settled != current:
+            return False
+        self._seen = settled
+        try:
+            self.install(self.build())
+        except Exception as e:
+            print(f"Template reload failed, keeping current layout: {e}")
+            return False
+        self.reloads += 1
+        print(f"Reloaded layout from {', '.join(sorted(settled))}")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Template watcher error: {e}")
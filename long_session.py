@@ -0,0 +1,133 @@
+"""
+Retention bounds for running a scoreboard through a whole meet.
+
+A meet runs for four hours or more, so nothing may grow with the number
+of frames received. With `--long-session`:
+
+  serial capture   `RotatingCaptureLog`: serial_log.bin is rolled over to
+                   serial_log.bin.1 .. .N at `max_bytes`, oldest dropped
+  console output   `ConsoleLimiter`: at most `max_lines` lines per `period`
+                   seconds; the rest are counted and summarized
+  frame decoder    fixed `capacity` buffer (RTDFrameDecoder)
+  de-duplication   `max_entries` and `window` (FrameDeduplicator)
+  latency samples  `LatencyStats`: last `window` samples per stage
+
+`soak_memory.py` replays captures through these pieces for hours of
+simulated time and fails if memory or object counts keep growing.
+"""
+import os
+import statistics
+import time
+from collections import deque
+
+DEFAULT_LOG_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_LOG_BACKUPS = 3
+
+
+class RotatingCaptureLog:
+    """
+    Append-only binary capture that rolls over at `max_bytes` keeping
+    `backups` older files (`path.1` is the newest). `max_bytes=0` never
+    rolls over, which is the old append-forever behaviour.
+    """
+
+    def __init__(self, path="serial_log.bin", max_bytes=0, backups=DEFAULT_LOG_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.rotations = 0
+        self.f = open(path, "ab")
+        self.size = self.f.tell()
+
+    def write(self, data):
+        if self.max_bytes and self.size + len(data) > self.max_bytes and self.size:
+            self._rotate()
+        self.f.write(data)
+        self.size += len(data)
+
+    def flush(self):
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _rotate(self):
+        self.f.close()
+        if self.backups > 0:
+            for i in range(self.backups - 1, 0, -1):
+                older = f"{self.path}.{i}"
+                if os.path.exists(older):
+                    os.replace(older, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.f = open(self.path, "ab")
+        self.size = 0
+        self.rotations += 1
+
+
+class ConsoleLimiter:
+    """
+    A drop-in for print() that lets through at most `max_lines` lines per
+    `period` seconds. Lines over the limit are dropped and counted; the
+    count is printed when the next period starts.
+    """
+
+    def __init__(self, max_lines=20, period=60.0, out=print):
+        self.max_lines = max_lines
+        self.period = period
+        self.out = out
+        self.window_start = time.monotonic()
+        self.lines = 0
+        self.suppressed = 0
+        self.total_suppressed = 0
+
+    def __call__(self, *args, **kwargs):
+        now = time.monotonic()
+        if now - self.window_start >= self.period:
+            if self.suppressed:
+                self.out(f"({self.suppressed} console lines suppressed in the last {self.period:g} s)")
+            self.window_start = now
+            self.lines = 0
+            self.suppressed = 0
+        if self.lines < self.max_lines:
+            self.lines += 1
+            self.out(*args, **kwargs)
+        else:
+            self.suppressed += 1
+            self.total_suppressed += 1
+
+
+class LatencyStats:
+    """Send-to-stage latencies (seconds) per stage, keeping the most recent `window` samples."""
+
+    def __init__(self, window=100000):
+        self.samples = {}
+        self.window = window
+        self.counts = {}
+
+    def add(self, stage, seconds):
+        if stage not in self.samples:
+            self.samples[stage] = deque(maxlen=self.window)
+            self.counts[stage] = 0
+        self.samples[stage].append(seconds)
+        self.counts[stage] += 1
+
+    def summary(self):
+        lines = []
+        for stage, values in self.samples.items():
+            ordered = sorted(values)
+            if not ordered:
+                continue
+            p95 = ordered[max(int(len(ordered) * 0.95) - 1, 0)]
+            lines.append(
+                f"{stage:7} n={self.counts[stage]:<8d} median {statistics.median(ordered) * 1000:7.1f} ms  "
+                f"p95 {p95 * 1000:7.1f} ms  max {ordered[-1] * 1000:7.1f} ms"
+            )
+        return "\n".join(lines)
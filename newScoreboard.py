@@ -1,5 +1,7 @@
 import socket
 import os
+import time
+from collections import namedtuple
 
 # -------------------------------------------------------------------
 # RTD FIELD DEFINITIONS (from OmniSport 2000 Appendix D)
@@ -22,6 +24,248 @@ RTD_FIELDS = [
     ("lane_8", 9),
 ]
 
+# -------------------------------------------------------------------
+# RTD SERIAL FRAMING
+# Every message on the RTD port (and inside each RTD UDP packet) is
+#   SYN <8 digit sequence> SOH <6 digit type><4 digit offset>
+#   STX <payload> EOT <2 hex digit checksum> ETB
+# The 4 digit offset is the 0-based character position of the payload
+# inside the ITF template. The checksum is the low byte of the sum of
+# every byte after SYN up to and including EOT.
+# -------------------------------------------------------------------
+SYN = 0x16
+SOH = 0x01
+STX = 0x02
+EOT = 0x04
+ETB = 0x17
+
+RTD_SEQUENCE_LEN = 8
+RTD_HEADER_LEN = 10
+# SYN + sequence + SOH + header + STX
+RTD_PAYLOAD_START = 1 + RTD_SEQUENCE_LEN + 1 + RTD_HEADER_LEN + 1
+# EOT + checksum + ETB
+RTD_TRAILER_LEN = 4
+
+
+def rtd_checksum(body):
+    """Return the two character checksum for `body` (the bytes between SYN and the checksum)."""
+    return b"%02X" % (sum(body) & 0xFF)
+
+
+# One decoded message. `offset` is the ITF character position of `payload`.
+RTDFrame = namedtuple("RTDFrame", "sequence control offset payload checksum")
+
+
+def build_rtd_frame(offset, payload, sequence=0, control=b"004210"):
+    """Encode one message the way the console sends it (see framing notes above)."""
+    body = (b"%0*d" % (RTD_SEQUENCE_LEN, sequence) + bytes([SOH]) + control + b"%04d" % offset
+            + bytes([STX]) + payload + bytes([EOT]))
+    return bytes([SYN]) + body + rtd_checksum(body) + bytes([ETB])
+
+
+# The console leaves the sequence field at zero; test feeds may put the send
+# time there instead (wall-clock milliseconds, wrapping about every 27 hours)
+SEQUENCE_MODULUS = 10 ** RTD_SEQUENCE_LEN
+
+
+def sequence_timestamp(now=None):
+    """Current wall-clock time as an RTD sequence number (milliseconds, wrapped)."""
+    if now is None:
+        now = time.time()
+    return int(now * 1000) % SEQUENCE_MODULUS
+
+
+def sequence_age(sequence, now=None):
+    """Seconds since a `sequence_timestamp` value (bytes or int) was taken."""
+    if now is None:
+        now = time.time()
+    return ((int(now * 1000) - int(sequence)) % SEQUENCE_MODULUS) / 1000.0
+
+
+def parse_rtd_frame(raw):
+    """
+    Validate one complete SYN..ETB message and return an RTDFrame,
+    or None if the framing, header digits or checksum are wrong.
+    """
+    if len(raw) < RTD_PAYLOAD_START + RTD_TRAILER_LEN:
+        return None
+    if raw[0] != SYN or raw[-1] != ETB or raw[-4] != EOT:
+        return None
+    if raw[1 + RTD_SEQUENCE_LEN] != SOH or raw[RTD_PAYLOAD_START - 1] != STX:
+        return None
+    header = raw[2 + RTD_SEQUENCE_LEN:RTD_PAYLOAD_START - 1]
+    if not header.isdigit():
+        return None
+    checksum = raw[-3:-1]
+    if rtd_checksum(raw[1:-3]) != checksum:
+        return None
+    payload = raw[RTD_PAYLOAD_START:-4]
+    if EOT in payload:
+        return None
+    return RTDFrame(
+        raw[1:1 + RTD_SEQUENCE_LEN],
+        header[:6],
+        int(header[6:]),
+        payload,
+        checksum,
+    )
+
+
+class RTDFrameDecoder:
+    """
+    Incremental decoder for the SYN..ETB framing above.
+
+    Feed it raw bytes as they arrive (any chunk size) and it returns the
+    complete, checksum-valid frames found so far. A partial frame is kept
+    until the rest of it arrives.
+
+    Resynchronization is driven by the header: after garbage the decoder
+    skips straight to the next SYN whose fixed positions (SOH, ten header
+    digits, STX) look right, and keeps a frame only if its checksum
+    matches. A header that turns out to be bad costs just its SYN byte,
+    so a real frame starting inside it is still found, and a frame cut
+    off by the next header is dropped without swallowing that header.
+
+    Memory is bounded by `capacity`: bytes live in one preallocated
+    buffer that is compacted in place and never grows. Every byte that
+    is skipped is counted in `bytes_discarded`.
+    """
+
+    def __init__(self, capacity=4096):
+        if capacity < RTD_PAYLOAD_START + RTD_TRAILER_LEN:
+            raise ValueError(f"capacity {capacity} is smaller than an empty frame")
+        self.capacity = capacity
+        self.buffer = bytearray(capacity)
+        self.start = 0      # first byte not yet consumed
+        self.end = 0        # one past the last byte received
+        self.base = 0       # stream position of buffer[0]
+        self.frames_decoded = 0
+        self.bad_frames = 0
+        self.bytes_discarded = 0
+        self._offsets = None
+
+    def buffered(self):
+        """Number of bytes held waiting for the rest of a frame."""
+        return self.end - self.start
+
+    def stats(self):
+        return {
+            "frames": self.frames_decoded,
+            "bad_frames": self.bad_frames,
+            "bytes_discarded": self.bytes_discarded,
+            "buffered": self.buffered(),
+        }
+
+    def feed(self, data, offsets=None):
+        """
+        Add `data` and return the frames it completed. If `offsets` is a
+        list, the stream position of each returned frame's SYN is appended
+        to it (used by rtd_batch to line frames up with a capture).
+        """
+        frames = []
+        self._offsets = offsets
+        view = memoryview(data)
+        while len(view):
+            if self.end == self.capacity:
+                self._compact()
+                if self.end == self.capacity:
+                    # One header has filled the whole buffer without an
+                    # EOT; it cannot be a real frame.
+                    self.bad_frames += 1
+                    self._discard_to(self.start + 1)
+                    self._scan(frames)
+                    self._compact()
+            n = min(len(view), self.capacity - self.end)
+            self.buffer[self.end:self.end + n] = view[:n]
+            self.end += n
+            view = view[n:]
+            self._scan(frames)
+        return frames
+
+    def _discard_to(self, pos):
+        self.bytes_discarded += pos - self.start
+        self.start = pos
+
+    def _compact(self):
+        n = self.end - self.start
+        if self.start and n:
+            mv = memoryview(self.buffer)
+            mv[:n] = mv[self.start:self.end]
+        self.base += self.start
+        self.start, self.end = 0, n
+
+    def _header_state(self, syn):
+        """True if a full plausible header is at `syn`, False if it is wrong, None if incomplete."""
+        buf = self.buffer
+        avail = self.end - syn
+        soh = 1 + RTD_SEQUENCE_LEN
+        if avail > soh and buf[syn + soh] != SOH:
+            return False
+        for i in range(soh + 1, min(soh + 1 + RTD_HEADER_LEN, avail)):
+            if not 0x30 <= buf[syn + i] <= 0x39:
+                return False
+        if avail < RTD_PAYLOAD_START:
+            return None
+        return buf[syn + RTD_PAYLOAD_START - 1] == STX
+
+    def _scan(self, frames):
+        buf = self.buffer
+        while True:
+            syn = buf.find(SYN, self.start, self.end)
+            if syn == -1:
+                self._discard_to(self.end)
+                self.base += self.end
+                self.start = self.end = 0
+                return
+            if syn > self.start:
+                self._discard_to(syn)
+
+            state = self._header_state(syn)
+            if state is None:
+                return
+            if not state:
+                self._discard_to(syn + 1)
+                continue
+
+            payload_start = syn + RTD_PAYLOAD_START
+            eot = buf.find(EOT, payload_start, self.end)
+            # The payload is ASCII, so a SYN before the EOT means this
+            # frame was cut off and the next one has already started.
+            cut = buf.find(SYN, payload_start, eot if eot != -1 else self.end)
+            if cut != -1:
+                self.bad_frames += 1
+                self._discard_to(cut)
+                continue
+            if eot == -1 or eot + RTD_TRAILER_LEN > self.end:
+                return
+
+            frame = parse_rtd_frame(bytes(buf[syn:eot + RTD_TRAILER_LEN]))
+            if frame is None:
+                self.bad_frames += 1
+                self._discard_to(syn + 1)
+                continue
+            frames.append(frame)
+            if self._offsets is not None:
+                self._offsets.append(self.base + syn)
+            self.frames_decoded += 1
+            self.start = eot + RTD_TRAILER_LEN
+
+
+def read_serial_available(ser, max_read=4096):
+    """
+    Read from a pyserial port, sized to what the driver already holds.
+
+    If bytes are already waiting (a burst of lane results) they are all
+    taken in one read, up to `max_read`. Otherwise this blocks only
+    until the next frame's ETB arrives (or the port timeout), so a short
+    clock frame is handed on as soon as it is complete instead of
+    sitting in the driver until a fixed-size read fills up.
+    """
+    waiting = ser.in_waiting
+    if waiting:
+        return ser.read(min(waiting, max_read))
+    return ser.read_until(bytes([ETB]), max_read)
+
 
 def parse_rtd_packet(data):
     """
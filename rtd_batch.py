@@ -0,0 +1,478 @@
+"""
+Offline batch decoding of RTD captures for post-meet analysis.
+
+Turns a whole capture (e.g. `serial_log.bin` or
+`serial_log-12-27-2025-data-for-test.bin`) into columnar arrays in a
+single pass instead of feeding it chunk by chunk through the live
+`RTDFrameDecoder`. Frame boundaries are found for the whole buffer at once
+and every field is pulled out at its fixed ITF offset.
+
+When NumPy is installed the frame scan and the field extraction are
+vectorized over all frames. Without NumPy the same columns are built
+with a single regular expression scan over the capture.
+
+Usage:
+    python rtd_batch.py serial_log.bin --csv meet.csv --npz meet.npz
+    python rtd_batch.py serial_log.bin --benchmark
+"""
+import argparse
+import array
+import csv
+import re
+import time
+
+from newScoreboard import (
+    SYN, SOH, STX, EOT, ETB,
+    RTD_SEQUENCE_LEN, RTD_PAYLOAD_START,
+    RTDFrameDecoder, load_itf_field_defs, rtd_checksum,
+)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Output columns, in export order. Integer columns use -1 for "not present".
+#   offset    - byte offset of the frame's SYN in the capture
+#   timestamp - seconds since start of capture, estimated from the baud rate
+#   control   - 4 digit header offset (position of the payload in the ITF)
+#   length    - payload length
+#   event     - event number (carried forward from the last event frame)
+#   heat      - heat number (carried forward from the last event frame)
+#   lane      - lane number for lane result frames
+#   place     - place for lane result frames
+#   time      - running or split/finish time in hundredths of a second
+COLUMNS = ("offset", "timestamp", "control", "length", "event", "heat", "lane", "place", "time")
+
+# SYN <seq> SOH <type><offset> STX <payload> EOT <checksum> ETB
+FRAME_RE = re.compile(
+    rb"\x16(.{%d})\x01(\d{6})(\d{4})\x02([^\x04\x16]*)\x04([0-9A-F]{2})\x17" % RTD_SEQUENCE_LEN,
+    re.S,
+)
+
+# Position of the 4 digit offset inside a frame, relative to SYN
+_CONTROL_START = 1 + RTD_SEQUENCE_LEN + 1 + 6
+
+
+class CaptureLayout:
+    """Fixed field offsets needed for the columns, resolved from an ITF once."""
+
+    def __init__(self, itf_path="OS2-Swimming.itf"):
+        offsets = {}
+        pos = 0
+        for name, length in load_itf_field_defs(itf_path):
+            offsets[name] = (pos, length)
+            pos += length
+
+        self.running_time = offsets.get("Running Time")
+        self.event = offsets.get("Event Number")
+        self.heat = offsets.get("Heat Number")
+
+        # (default lane, lane field, place field, time field) per result line
+        self.lines = []
+        prefixes = []
+        n = 1
+        while f"Line {n} Lane Number" in offsets:
+            prefixes.append((n, f"Line {n}"))
+            n += 1
+        prefixes.append((-1, "Single Line"))
+        for default_lane, prefix in prefixes:
+            lane = offsets.get(f"{prefix} Lane Number")
+            place = offsets.get(f"{prefix} Place Number")
+            finish = offsets.get(f"{prefix} Split/Finish Time")
+            if lane or place or finish:
+                self.lines.append((default_lane, lane, place, finish))
+
+
+def time_to_hundredths(text):
+    """Parse 'M:SS.ff', 'SS.f' or 'SS.ff' into hundredths. Returns -1 if not a time."""
+    s = text.strip()
+    if not s:
+        return -1
+    mins = 0
+    if ":" in s:
+        m, s = s.split(":", 1)
+        if not m.isdigit():
+            return -1
+        mins = int(m)
+    whole, _, frac = s.partition(".")
+    if not whole.isdigit() or (frac and not frac.isdigit()):
+        return -1
+    frac = (frac + "00")[:2]
+    return (mins * 60 + int(whole)) * 100 + int(frac)
+
+
+def _int_or_missing(text):
+    s = text.strip()
+    return int(s) if s.isdigit() else -1
+
+
+def _covered(field, control, length):
+    """Return the field's slice inside a payload at `control`, or None if not fully covered."""
+    if field is None:
+        return None
+    off, width = field
+    rel = off - control
+    if rel < 0 or rel + width > length:
+        return None
+    return rel, rel + width
+
+
+def _decode_row(layout, control, payload):
+    """Extract (event, heat, lane, place, time) from one payload. Missing values are -1."""
+    length = len(payload)
+    text = payload.decode("ascii", errors="replace")
+    event = heat = lane = place = hundredths = -1
+
+    s = _covered(layout.event, control, length)
+    if s:
+        event = _int_or_missing(text[s[0]:s[1]])
+    s = _covered(layout.heat, control, length)
+    if s:
+        heat = _int_or_missing(text[s[0]:s[1]])
+    s = _covered(layout.running_time, control, length)
+    if s:
+        hundredths = time_to_hundredths(text[s[0]:s[1]])
+
+    for default_lane, lane_f, place_f, finish_f in layout.lines:
+        s = _covered(finish_f, control, length)
+        if s:
+            hundredths = time_to_hundredths(text[s[0]:s[1]])
+            lane = default_lane
+            s = _covered(lane_f, control, length)
+            if s:
+                value = _int_or_missing(text[s[0]:s[1]])
+                lane = value if value != -1 else default_lane
+            s = _covered(place_f, control, length)
+            if s:
+                place = _int_or_missing(text[s[0]:s[1]])
+
+    return event, heat, lane, place, hundredths
+
+
+class _ColumnBuilder:
+    """Accumulates rows into `array.array` columns, carrying event/heat forward."""
+
+    def __init__(self, layout, baudrate):
+        self.layout = layout
+        self.seconds_per_byte = 10.0 / baudrate  # 8N1: 10 bits on the wire per byte
+        self.event = -1
+        self.heat = -1
+        self.cols = {name: array.array("q") for name in COLUMNS}
+        self.cols["timestamp"] = array.array("d")
+
+    def add(self, offset, control, payload):
+        event, heat, lane, place, hundredths = _decode_row(self.layout, control, payload)
+        if event != -1:
+            self.event = event
+        if heat != -1:
+            self.heat = heat
+        c = self.cols
+        c["offset"].append(offset)
+        c["timestamp"].append(offset * self.seconds_per_byte)
+        c["control"].append(control)
+        c["length"].append(len(payload))
+        c["event"].append(self.event)
+        c["heat"].append(self.heat)
+        c["lane"].append(lane)
+        c["place"].append(place)
+        c["time"].append(hundredths)
+
+
+def _decode_regex(data, layout, baudrate):
+    builder = _ColumnBuilder(layout, baudrate)
+    for m in FRAME_RE.finditer(data):
+        body = data[m.start() + 1:m.end(5) - 2]
+        if rtd_checksum(body) != m.group(5):
+            continue
+        builder.add(m.start(), int(m.group(3)), m.group(4))
+    return builder.cols
+
+
+# ---------------------------------------------------------------------------
+# NumPy path
+# ---------------------------------------------------------------------------
+
+def _np_parse_int(mat):
+    """Vectorized `_int_or_missing` over the rows of a 2D uint8 array."""
+    n, width = mat.shape
+    value = np.zeros(n, dtype=np.int64)
+    started = np.zeros(n, dtype=bool)
+    ended = np.zeros(n, dtype=bool)
+    bad = np.zeros(n, dtype=bool)
+    for col in range(width):
+        c = mat[:, col]
+        is_digit = (c >= 0x30) & (c <= 0x39)
+        is_space = c == 0x20
+        bad |= ~(is_digit | is_space) | (is_digit & ended)
+        ended |= is_space & started
+        value = np.where(is_digit, value * 10 + (c.astype(np.int64) - 0x30), value)
+        started |= is_digit
+    return np.where(started & ~bad, value, -1)
+
+
+def _np_parse_time(mat):
+    """Vectorized `time_to_hundredths` over the rows of a 2D uint8 array."""
+    n, width = mat.shape
+    whole = np.zeros(n, dtype=np.int64)
+    whole_digits = np.zeros(n, dtype=np.int64)
+    mins = np.zeros(n, dtype=np.int64)
+    frac = np.zeros(n, dtype=np.int64)
+    frac_digits = np.zeros(n, dtype=np.int64)
+    colon = np.zeros(n, dtype=bool)
+    dot = np.zeros(n, dtype=bool)
+    started = np.zeros(n, dtype=bool)
+    ended = np.zeros(n, dtype=bool)
+    bad = np.zeros(n, dtype=bool)
+    for col in range(width):
+        c = mat[:, col]
+        is_digit = (c >= 0x30) & (c <= 0x39)
+        is_space = c == 0x20
+        is_colon = c == 0x3A
+        is_dot = c == 0x2E
+        d = c.astype(np.int64) - 0x30
+
+        bad |= ~(is_digit | is_space | is_colon | is_dot)
+        bad |= ~is_space & ended
+        bad |= is_colon & (colon | dot | (whole_digits == 0))
+        bad |= is_dot & (dot | (whole_digits == 0))
+        ended |= is_space & started
+
+        in_frac = is_digit & dot
+        keep = in_frac & (frac_digits < 2)
+        frac = np.where(keep, frac * 10 + d, frac)
+        frac_digits = np.where(keep, frac_digits + 1, frac_digits)
+        in_whole = is_digit & ~dot
+        whole = np.where(in_whole, whole * 10 + d, whole)
+        whole_digits = np.where(in_whole, whole_digits + 1, whole_digits)
+
+        mins = np.where(is_colon, whole, mins)
+        whole = np.where(is_colon, 0, whole)
+        whole_digits = np.where(is_colon, 0, whole_digits)
+        colon |= is_colon
+        dot |= is_dot
+        started |= ~is_space
+
+    frac = np.where(frac_digits == 1, frac * 10, frac)
+    result = (mins * 60 + whole) * 100 + frac
+    return np.where(started & ~bad & (whole_digits > 0), result, -1)
+
+
+def _np_frame_bounds(buf):
+    """Return (syn, payload_end) index arrays for every valid frame in `buf`."""
+    size = len(buf)
+    syn = np.flatnonzero(buf == SYN)
+    syn = syn[syn + RTD_PAYLOAD_START <= size]
+    syn = syn[(buf[syn + RTD_PAYLOAD_START - 1] == STX) & (buf[syn + 1 + RTD_SEQUENCE_LEN] == SOH)]
+
+    # The 6 digit type and 4 digit offset must be ASCII digits
+    header = buf[(syn + 1 + RTD_SEQUENCE_LEN + 1)[:, None] + np.arange(10)]
+    syn = syn[np.all((header >= 0x30) & (header <= 0x39), axis=1)]
+
+    # Pair each header with the first EOT after its payload start
+    eot = np.flatnonzero(buf == EOT)
+    idx = np.searchsorted(eot, syn + RTD_PAYLOAD_START)
+    has_eot = idx < len(eot)
+    syn, end = syn[has_eot], eot[idx[has_eot]]
+    fits = end + 3 < size
+    syn, end = syn[fits], end[fits]
+    framed = buf[end + 3] == ETB
+    syn, end = syn[framed], end[framed]
+
+    # A truncated frame is followed by the next SYN before any EOT; the
+    # payload is ASCII so a SYN inside it means this header is not a frame.
+    all_syn = np.flatnonzero(buf == SYN)
+    clean = np.searchsorted(all_syn, end) == np.searchsorted(all_syn, syn) + 1
+    syn, end = syn[clean], end[clean]
+
+    # Checksum: low byte of sum(buf[syn+1 .. end]) against two hex digits
+    hex_value = np.full(256, -1, dtype=np.int64)
+    hex_value[0x30:0x3A] = np.arange(10)
+    hex_value[0x41:0x47] = np.arange(10, 16)
+    hi, lo = hex_value[buf[end + 1]], hex_value[buf[end + 2]]
+    cumulative = np.cumsum(buf, dtype=np.int64)
+    body_sum = cumulative[end] - cumulative[syn]
+    ok = (hi >= 0) & (lo >= 0) & ((body_sum & 0xFF) == hi * 16 + lo)
+    return syn[ok], end[ok]
+
+
+def _np_field(buf, start, length, control, field):
+    """Gather `field` from every payload covering it. Returns (row mask, 2D byte matrix)."""
+    off, width = field
+    rel = off - control
+    mask = (rel >= 0) & (rel + width <= length)
+    rows = (start[mask] + rel[mask])[:, None] + np.arange(width)
+    return mask, buf[rows]
+
+
+def _np_carry_forward(values):
+    """Replace -1 entries with the last value that was not -1."""
+    idx = np.where(values != -1, np.arange(len(values)), -1)
+    idx = np.maximum.accumulate(idx) if len(idx) else idx
+    return np.where(idx >= 0, values[np.maximum(idx, 0)], -1)
+
+
+def _decode_numpy(data, layout, baudrate):
+    buf = np.frombuffer(data, dtype=np.uint8)
+    syn, end = _np_frame_bounds(buf)
+    start = syn + RTD_PAYLOAD_START
+    length = end - start
+    digits = buf[(syn + _CONTROL_START)[:, None] + np.arange(4)].astype(np.int64) - 0x30
+    control = digits @ np.array([1000, 100, 10, 1], dtype=np.int64)
+
+    n = len(syn)
+    event = np.full(n, -1, dtype=np.int64)
+    heat = np.full(n, -1, dtype=np.int64)
+    lane = np.full(n, -1, dtype=np.int64)
+    place = np.full(n, -1, dtype=np.int64)
+    hundredths = np.full(n, -1, dtype=np.int64)
+
+    if layout.event:
+        mask, mat = _np_field(buf, start, length, control, layout.event)
+        event[mask] = _np_parse_int(mat)
+    if layout.heat:
+        mask, mat = _np_field(buf, start, length, control, layout.heat)
+        heat[mask] = _np_parse_int(mat)
+    if layout.running_time:
+        mask, mat = _np_field(buf, start, length, control, layout.running_time)
+        hundredths[mask] = _np_parse_time(mat)
+
+    for default_lane, lane_f, place_f, finish_f in layout.lines:
+        if not finish_f:
+            continue
+        line_mask, mat = _np_field(buf, start, length, control, finish_f)
+        hundredths[line_mask] = _np_parse_time(mat)
+        line_lane = np.full(n, default_lane, dtype=np.int64)
+        if lane_f:
+            mask, mat = _np_field(buf, start, length, control, lane_f)
+            parsed = _np_parse_int(mat)
+            line_lane[mask] = np.where(parsed != -1, parsed, default_lane)
+        lane[line_mask] = line_lane[line_mask]
+        if place_f:
+            mask, mat = _np_field(buf, start, length, control, place_f)
+            line_place = np.full(n, -1, dtype=np.int64)
+            line_place[mask] = _np_parse_int(mat)
+            place[line_mask] = line_place[line_mask]
+
+    return {
+        "offset": syn.astype(np.int64),
+        "timestamp": syn * (10.0 / baudrate),
+        "control": control,
+        "length": length.astype(np.int64),
+        "event": _np_carry_forward(event),
+        "heat": _np_carry_forward(heat),
+        "lane": lane,
+        "place": place,
+        "time": hundredths,
+    }
+
+
+def decode_capture(data, itf_path="OS2-Swimming.itf", baudrate=19200, use_numpy=None):
+    """
+    Decode a whole RTD capture into a dict of equal-length columns (see COLUMNS).
+
+    Uses NumPy arrays when NumPy is installed (or `use_numpy` is True),
+    otherwise `array.array` columns. Frames with a bad checksum are dropped.
+    """
+    layout = itf_path if isinstance(itf_path, CaptureLayout) else CaptureLayout(itf_path)
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy:
+        if np is None:
+            raise ImportError("numpy is required for the vectorized decoder")
+        return _decode_numpy(data, layout, baudrate)
+    return _decode_regex(data, layout, baudrate)
+
+
+def decode_streaming(data, itf_path="OS2-Swimming.itf", baudrate=19200, chunk=64):
+    """
+    Reference decoder: feeds the capture through the live `RTDFrameDecoder`
+    in `chunk`-byte reads, the size a USB serial adapter typically hands
+    over. Produces the same columns as `decode_capture` and is used as the
+    benchmark baseline.
+    """
+    layout = itf_path if isinstance(itf_path, CaptureLayout) else CaptureLayout(itf_path)
+    builder = _ColumnBuilder(layout, baudrate)
+    decoder = RTDFrameDecoder()
+    offsets = []
+    for pos in range(0, len(data), chunk):
+        for frame, offset in zip(decoder.feed(data[pos:pos + chunk], offsets), offsets):
+            builder.add(offset, frame.offset, frame.payload)
+        offsets.clear()
+    return builder.cols
+
+
+def write_csv(columns, path):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        writer.writerows(zip(*(columns[name] for name in COLUMNS)))
+
+
+def write_npz(columns, path):
+    if np is None:
+        raise ImportError("numpy is required to write .npz files")
+    np.savez_compressed(path, **{name: np.asarray(columns[name]) for name in COLUMNS})
+
+
+def benchmark(data, layout, baudrate=19200, repeat=3):
+    """Time the batch decoder(s) against the live streaming decoder."""
+    def best_of(fn):
+        best = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            cols = fn()
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        return best, cols
+
+    runs = [("streaming", lambda: decode_streaming(data, layout, baudrate))]
+    runs.append(("batch (regex)", lambda: decode_capture(data, layout, baudrate, use_numpy=False)))
+    if np is not None:
+        runs.append(("batch (numpy)", lambda: decode_capture(data, layout, baudrate, use_numpy=True)))
+
+    print(f"Capture: {len(data)} bytes")
+    reference = None
+    for label, fn in runs:
+        elapsed, cols = best_of(fn)
+        frames = len(cols["offset"])
+        status = ""
+        if reference is None:
+            reference = cols
+        else:
+            same = all(list(cols[name]) == list(reference[name]) for name in COLUMNS)
+            status = "  matches streaming" if same else "  MISMATCH vs streaming"
+        print(f"{label:15}: {elapsed * 1000:9.2f} ms  {frames} frames  "
+              f"{len(data) / elapsed / 1e6:7.2f} MB/s{status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch decode an RTD capture into columns")
+    parser.add_argument("capture", help="Path to a binary RTD capture (e.g. serial_log.bin)")
+    parser.add_argument("--itf", default="OS2-Swimming.itf", help="ITF template the capture was sent with")
+    parser.add_argument("--baudrate", type=int, default=19200, help="Baud rate used to estimate timestamps")
+    parser.add_argument("--csv", help="Write columns to this CSV file")
+    parser.add_argument("--npz", help="Write columns to this .npz file (requires numpy)")
+    parser.add_argument("--no-numpy", action="store_true", help="Use the regex batch decoder even if numpy is installed")
+    parser.add_argument("--benchmark", action="store_true", help="Compare batch and streaming decoding")
+    args = parser.parse_args()
+
+    with open(args.capture, "rb") as f:
+        data = f.read()
+    layout = CaptureLayout(args.itf)
+
+    if args.benchmark:
+        benchmark(data, layout, args.baudrate)
+
+    columns = decode_capture(data, layout, args.baudrate, use_numpy=False if args.no_numpy else None)
+    print(f"Decoded {len(columns['offset'])} frames from {args.capture}")
+    if args.csv:
+        write_csv(columns, args.csv)
+        print(f"Wrote {args.csv}")
+    if args.npz:
+        write_npz(columns, args.npz)
+        print(f"Wrote {args.npz}")
+
+
+if __name__ == "__main__":
+    main()
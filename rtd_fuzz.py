@@ -0,0 +1,188 @@
+"""
+Fuzz / soak harness for the RTD frame decoder.
+
+Injects random bit errors into a capture (default: the sample capture)
+and feeds the result through `RTDFrameDecoder` in random-sized chunks,
+the way a noisy serial line delivers it. For each bit error rate it
+reports how many of the original frames came through intact, how many
+frames a perfect decoder could have recovered (those with no flipped
+bit), any corrupted frames that slipped past the checksum, the bytes
+discarded while resyncing, and throughput. The legacy STX/EOT framing
+that `_read_loop` used before is measured alongside for comparison;
+it has no checksum, so its "false" count is corrupted payloads it
+passed on to the board.
+
+Usage:
+    python rtd_fuzz.py
+    python rtd_fuzz.py --ber 1e-4 1e-3 --soak 600
+"""
+import argparse
+import random
+import time
+from collections import Counter
+
+from newScoreboard import SYN, SOH, STX, EOT, ETB, RTDFrameDecoder
+
+
+def inject_bit_errors(data, ber, rng):
+    """Return a copy of `data` with each bit flipped with probability `ber`, and the flip count."""
+    out = bytearray(data)
+    nbits = len(out) * 8
+    flips = 0
+    if ber <= 0:
+        return out, flips
+    # Geometric gaps between flipped bits instead of one draw per bit
+    pos = int(rng.expovariate(ber))
+    while pos < nbits:
+        out[pos // 8] ^= 1 << (pos % 8)
+        flips += 1
+        pos += 1 + int(rng.expovariate(ber))
+    return out, flips
+
+
+def frame_spans(data):
+    """(start, end) of every SYN..ETB frame in a clean capture, end exclusive."""
+    decoder = RTDFrameDecoder(capacity=len(data) + 64)
+    spans = []
+    pos = 0
+    for frame in decoder.feed(data):
+        raw = (bytes([SYN]) + frame.sequence + bytes([SOH]) + frame.control + b"%04d" % frame.offset
+               + bytes([STX]) + frame.payload + bytes([EOT]) + frame.checksum + bytes([ETB]))
+        start = data.index(raw, pos)
+        pos = start + len(raw)
+        spans.append((start, pos))
+    return spans
+
+
+def _chunks(data, rng, max_chunk):
+    pos = 0
+    while pos < len(data):
+        n = rng.randint(1, max_chunk)
+        yield data[pos:pos + n]
+        pos += n
+
+
+def legacy_frames(data, rng, max_chunk):
+    """Payloads found by the old STX/EOT `_read_loop` framing."""
+    buffer = b''
+    found = []
+    for chunk in _chunks(data, rng, max_chunk):
+        buffer += chunk
+        while True:
+            start = buffer.find(bytes([STX]))
+            end = buffer.find(bytes([EOT]), start + 1)
+            if start != -1 and end != -1 and end > start:
+                found.append(buffer[start + 1:end])
+                buffer = buffer[end + 1:]
+            else:
+                if len(buffer) > 4096:
+                    buffer = buffer[-4096:]
+                break
+    return found
+
+
+def run_trial(clean, spans, expected, ber, seed, max_chunk=256, capacity=4096):
+    rng = random.Random(seed)
+    noisy, flips = inject_bit_errors(clean, ber, rng)
+
+    # Frames with no flipped byte are the most any decoder could recover
+    intact = sum(1 for a, b in spans if noisy[a:b] == clean[a:b])
+
+    decoder = RTDFrameDecoder(capacity)
+    remaining = Counter(expected)
+    recovered = false_accepts = 0
+    peak = 0
+    t0 = time.perf_counter()
+    for chunk in _chunks(noisy, rng, max_chunk):
+        for frame in decoder.feed(chunk):
+            key = (frame.offset, frame.payload)
+            if remaining[key] > 0:
+                remaining[key] -= 1
+                recovered += 1
+            else:
+                false_accepts += 1
+        peak = max(peak, decoder.buffered())
+    elapsed = time.perf_counter() - t0
+    assert peak <= capacity, f"decoder buffered {peak} bytes with capacity {capacity}"
+
+    # The legacy framing has no checksum, so it also hands on corrupted payloads
+    legacy_remaining = Counter(payload for _, payload in expected)
+    legacy = legacy_false = 0
+    for payload in legacy_frames(noisy, random.Random(seed), max_chunk):
+        if legacy_remaining[payload] > 0:
+            legacy_remaining[payload] -= 1
+            legacy += 1
+        else:
+            legacy_false += 1
+
+    return {
+        "ber": ber,
+        "flips": flips,
+        "frames": len(spans),
+        "intact": intact,
+        "recovered": recovered,
+        "legacy": legacy,
+        "legacy_false": legacy_false,
+        "false_accepts": false_accepts,
+        "discarded": decoder.bytes_discarded,
+        "bad_frames": decoder.bad_frames,
+        "peak_buffer": peak,
+        "mb_per_s": len(noisy) / elapsed / 1e6 if elapsed else 0.0,
+    }
+
+
+def print_result(r):
+    total = r["frames"] or 1
+    print(
+        f"BER {r['ber']:<8g} flips {r['flips']:6d}  "
+        f"recovered {r['recovered']:6d}/{r['frames']} ({100 * r['recovered'] / total:5.1f}%)  "
+        f"intact {100 * r['intact'] / total:5.1f}%  false {r['false_accepts']:3d}  "
+        f"legacy {100 * r['legacy'] / total:5.1f}% (false {r['legacy_false']:5d})  "
+        f"discarded {r['discarded']:7d} B  "
+        f"peak buf {r['peak_buffer']:5d} B  {r['mb_per_s']:6.2f} MB/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inject bit errors into a capture and measure frame recovery")
+    parser.add_argument("capture", nargs="?", default="serial_log-12-27-2025-data-for-test.bin",
+                        help="Clean RTD capture to corrupt")
+    parser.add_argument("--ber", type=float, nargs="+", default=[0, 1e-5, 1e-4, 1e-3, 1e-2],
+                        help="Bit error rates to test")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the first trial")
+    parser.add_argument("--max-chunk", type=int, default=256, help="Largest read size fed to the decoder")
+    parser.add_argument("--capacity", type=int, default=4096, help="Decoder buffer capacity in bytes")
+    parser.add_argument("--soak", type=float, default=0,
+                        help="Keep running trials with new seeds for this many seconds")
+    args = parser.parse_args()
+
+    with open(args.capture, "rb") as f:
+        clean = f.read()
+    spans = frame_spans(clean)
+    expected = [(f.offset, f.payload) for f in RTDFrameDecoder(len(clean) + 64).feed(clean)]
+    print(f"{args.capture}: {len(clean)} bytes, {len(spans)} frames")
+
+    seed = args.seed
+    for ber in args.ber:
+        print_result(run_trial(clean, spans, expected, ber, seed, args.max_chunk, args.capacity))
+        seed += 1
+
+    if args.soak > 0:
+        deadline = time.monotonic() + args.soak
+        trials = 0
+        worst = None
+        while time.monotonic() < deadline:
+            ber = args.ber[trials % len(args.ber)]
+            r = run_trial(clean, spans, expected, ber, seed, args.max_chunk, args.capacity)
+            seed += 1
+            trials += 1
+            if r["intact"] and (worst is None or r["recovered"] / r["intact"] < worst["recovered"] / worst["intact"]):
+                worst = r
+        print(f"Soak: {trials} trials, buffer never exceeded {args.capacity} bytes")
+        if worst:
+            print("Worst recovery relative to intact frames:")
+            print_result(worst)
+
+
+if __name__ == "__main__":
+    main()
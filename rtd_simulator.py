@@ -0,0 +1,260 @@
+"""
+Virtual OmniSport console on a pty (Linux/macOS).
+
+Plays an endless swim meet as properly framed RTD traffic: the running
+clock every tenth of a second, event titles and event/heat changes at
+the start of each race, swimmer names, and split/finish results with
+places as the lanes come in. The messages use the same offsets and
+payload layouts as the real console (see the sample capture), so the
+scoreboards exercise their normal serial, framing and parsing paths.
+
+`--speed` runs the meet faster than real time (every message is still
+sent, just closer together); `--baudrate` limits the output to a real
+line rate instead of the pty's unlimited speed.
+
+Every message carries its send time in the sequence field (see
+`sequence_timestamp`), so a receiver on the same machine can time the
+whole serial -> decode -> paint path. `gbs-swim-scoreboard.py --latency`
+does this; `--loopback` here measures serial -> decode without a display.
+
+Usage:
+    python rtd_simulator.py --speed 10
+        (then: python gbs-swim-scoreboard.py --port /dev/pts/N --latency)
+    python rtd_simulator.py --speed 50 --loopback --seconds 30
+"""
+import argparse
+import os
+import random
+import threading
+import time
+
+from long_session import LatencyStats
+from newScoreboard import (RTDFrameDecoder, build_rtd_frame, read_serial_available,
+                           sequence_age, sequence_timestamp)
+
+CLOCK_INTERVAL = 0.1
+LANE_COUNT = 8
+
+# Template offsets in OS2-Swimming.itf
+OFFSET_RUNNING_TIME = 0
+OFFSET_EVENT_TITLE_1 = 9
+OFFSET_EVENT_TITLE_2 = 39
+OFFSET_EVENT_TITLES = 69
+OFFSET_EVENT_HEAT = 99
+OFFSET_LINE_1 = 222
+LINE_LENGTH = 36
+OFFSET_SINGLE_LINE = 1000
+OFFSET_SINGLE_LINE_TIME = 1025
+
+FIRST_NAMES = ["Liam", "Noah", "Oliver", "Elijah", "James", "Lucas", "Mason", "Ethan",
+               "Aiden", "Logan", "Jackson", "Henry", "Owen", "Caleb", "Isaac", "Wyatt"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+              "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Martin", "Lee", "Kim"]
+TEAMS = ["GBS", "VHHS", "NTHS", "LFHS"]
+STROKES = [("Free", 1.0), ("Back", 1.1), ("Breast", 1.25), ("Fly", 1.08), ("IM", 1.15)]
+DISTANCES = [50, 100, 200]
+
+
+def format_clock(seconds):
+    """Running time payload, e.g. '    0.1  ' or ' 1:00.0  '."""
+    tenths = int(round(seconds * 10))
+    minutes, tenths = divmod(tenths, 600)
+    text = f"{minutes}:{tenths // 10:02d}.{tenths % 10}" if minutes else f"{tenths // 10}.{tenths % 10}"
+    return f"{text:>7}  ".encode("ascii")
+
+
+def format_result(seconds):
+    """Split/finish time field, e.g. '   18.12 ' or ' 1:00.94 '."""
+    hundredths = int(round(seconds * 100))
+    minutes, hundredths = divmod(hundredths, 6000)
+    text = f"{hundredths // 100}.{hundredths % 100:02d}"
+    if minutes:
+        text = f"{minutes}:{hundredths // 100:02d}.{hundredths % 100:02d}"
+    return f"{text:>8} ".encode("ascii")
+
+
+def lane_line(name, team, lane, place=None, seconds=None, lengths=None):
+    """A 36 character `Line N` record: name, team, lane, place, time, lengths completed."""
+    record = f"{name[:15]:<15}{team[:5]:<5}{lane:>2}".encode("ascii")
+    record += f"{place:>3}".encode("ascii") if place else b"   "
+    record += format_result(seconds) if seconds is not None else b" " * 9
+    record += f"{lengths:>2}".encode("ascii") if lengths else b"  "
+    return record
+
+
+def race_messages(event, heat, rng, lanes=LANE_COUNT, pause=5.0):
+    """
+    (console time, offset, payload) for one race in send order. Times
+    start at 0 when the clock resets and end after the post-race pause.
+    """
+    distance = rng.choice(DISTANCES)
+    stroke, factor = rng.choice(STROKES)
+    lengths = distance // 25
+    title = f"Boys {distance} Yard {stroke}"
+    messages = [
+        (0.0, OFFSET_RUNNING_TIME, format_clock(0)),
+        (0.0, OFFSET_SINGLE_LINE_TIME, format_clock(0)),
+        (0.0, OFFSET_EVENT_TITLE_1, f"{title:<30}".encode("ascii")),
+        (0.0, OFFSET_EVENT_TITLE_2, f"{'Timed Final':<30}".encode("ascii")),
+        (0.0, OFFSET_EVENT_TITLES, f"{title + ' Timed':<30}".encode("ascii")),
+        (0.0, OFFSET_EVENT_HEAT, f"{event:>3} {heat:>2}{'':20}F{lengths:>2}".encode("ascii")),
+    ]
+
+    swimmers = []
+    for lane in range(1, lanes + 1):
+        name = f"{rng.choice(LAST_NAMES)}, {rng.choice(FIRST_NAMES)}"
+        team = rng.choice(TEAMS)
+        per_length = 12.0 * factor * rng.uniform(0.9, 1.2)
+        swimmers.append((lane, name, team, per_length))
+        messages.append((0.0, OFFSET_LINE_1 + LINE_LENGTH * (lane - 1), lane_line(name, team, lane)))
+
+    # A split every 50 (two lengths), placed against the other lanes at that split
+    finish = 0.0
+    for done in range(2, lengths + 1, 2):
+        splits = sorted((per_length * done * rng.uniform(0.98, 1.02), lane, name, team)
+                        for lane, name, team, per_length in swimmers)
+        for place, (at, lane, name, team) in enumerate(splits, start=1):
+            record = lane_line(name, team, lane, place, at, done)
+            messages.append((at, OFFSET_LINE_1 + LINE_LENGTH * (lane - 1), record))
+            messages.append((at, OFFSET_SINGLE_LINE, record))
+            finish = max(finish, at)
+
+    tick = 1
+    while tick * CLOCK_INTERVAL <= finish + 1.0:
+        at = tick * CLOCK_INTERVAL
+        messages.append((at, OFFSET_RUNNING_TIME, format_clock(at)))
+        messages.append((at, OFFSET_SINGLE_LINE_TIME, format_clock(at)))
+        tick += 1
+    messages.sort(key=lambda m: m[0])
+    messages.append((finish + 1.0 + pause, None, None))
+    return messages
+
+
+def meet_messages(rng, lanes=LANE_COUNT, pause=5.0):
+    """Endless (console time, offset, payload) messages, race after race."""
+    start = 0.0
+    event = 1
+    while True:
+        for heat in range(1, rng.randint(1, 3) + 1):
+            end = start
+            for at, offset, payload in race_messages(event, heat, rng, lanes, pause):
+                end = start + at
+                if offset is not None:
+                    yield end, offset, payload
+            start = end
+        event += 1
+
+
+class VirtualConsole:
+    """Writes the simulated meet to the master side of a pty; readers open `port`."""
+
+    def __init__(self, speed=1.0, baudrate=0, lanes=LANE_COUNT, seed=None, pause=5.0):
+        self.speed = speed
+        self.baudrate = baudrate
+        self.lanes = lanes
+        self.pause = pause
+        self.rng = random.Random(seed)
+        # Imported here so LatencyStats and the message builders load on Windows
+        import tty
+        self.master, self.slave = os.openpty()
+        # Raw mode, so the line discipline neither echoes nor edits the frames
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.late = 0
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.thread.join(timeout=2.0)
+        os.close(self.master)
+        os.close(self.slave)
+
+    def run(self):
+        seconds_per_byte = 10.0 / self.baudrate if self.baudrate else 0.0
+        start = time.perf_counter()
+        line_free = start
+        for at, offset, payload in meet_messages(self.rng, self.lanes, self.pause):
+            if self._stop.is_set():
+                break
+            due = max(start + at / self.speed, line_free)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -0.05:
+                self.late += 1
+            frame = build_rtd_frame(offset, payload, sequence=sequence_timestamp())
+            try:
+                os.write(self.master, frame)
+            except OSError:
+                break
+            line_free = time.perf_counter() + len(frame) * seconds_per_byte
+            self.frames_sent += 1
+            self.bytes_sent += len(frame)
+
+
+def loopback(console, seconds, stats):
+    """Read the console back through pyserial and the frame decoder, timing decode latency."""
+    import serial
+
+    ser = serial.Serial(console.port, console.baudrate or 19200, timeout=1)
+    decoder = RTDFrameDecoder()
+    deadline = time.monotonic() + seconds
+    try:
+        while time.monotonic() < deadline:
+            data = read_serial_available(ser)
+            if not data:
+                continue
+            for frame in decoder.feed(data):
+                stats.add("decode", sequence_age(frame.sequence))
+    finally:
+        ser.close()
+    return decoder
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Virtual OmniSport RTD console on a pty")
+    parser.add_argument("--speed", type=float, default=1.0, help="Meet speed relative to the real console (e.g. 20)")
+    parser.add_argument("--baudrate", type=int, default=0, help="Limit output to this line rate (default: unlimited)")
+    parser.add_argument("--lanes", type=int, default=LANE_COUNT, help="Lanes in each race")
+    parser.add_argument("--pause", type=float, default=5.0, help="Console seconds between races")
+    parser.add_argument("--seed", type=int, help="Random seed for names and times")
+    parser.add_argument("--seconds", type=float, default=0, help="Stop after this many seconds (default: run until Ctrl-C)")
+    parser.add_argument("--loopback", action="store_true", help="Read the port back here and report decode latency")
+    args = parser.parse_args()
+
+    console = VirtualConsole(args.speed, args.baudrate, args.lanes, args.seed, args.pause)
+    console.start()
+    print(f"Virtual console on {console.port} ({args.speed:g}x)")
+    print(f"  python gbs-swim-scoreboard.py --port {console.port} --latency")
+
+    stats = LatencyStats()
+    t0 = time.monotonic()
+    try:
+        if args.loopback:
+            decoder = loopback(console, args.seconds or 10.0, stats)
+            print(f"decoded {decoder.frames_decoded} frames, {decoder.bad_frames} bad, "
+                  f"{decoder.bytes_discarded} bytes discarded")
+            print(stats.summary())
+        else:
+            while not args.seconds or time.monotonic() - t0 < args.seconds:
+                time.sleep(5.0)
+                elapsed = time.monotonic() - t0
+                print(f"sent {console.frames_sent} frames ({console.frames_sent / elapsed:.0f}/s, "
+                      f"{console.bytes_sent / elapsed / 1000:.1f} kB/s), {console.late} late")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        elapsed = time.monotonic() - t0
+        console.stop()
+        print(f"Sent {console.frames_sent} frames in {elapsed:.1f} s "
+              f"({console.frames_sent / elapsed:.0f} frames/s, {console.bytes_sent / elapsed / 1000:.1f} kB/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+"""
+Run several RTD consoles (serial ports and UDP feeds) in one process.
+
+Every source has its own frame decoder. Each `group` of sources has one
+ITF template image and the sport layout compiled from that template, so
+a dive console and a swim console can share the process without mixing
+their data. All sources are serviced from a single thread: sockets (and
+serial ports on Linux/macOS) are waited on with a shared selector,
+anything the selector cannot wait on (serial ports on Windows, replay
+files) is polled from the same loop.
+
+By default every source is its own group. Sources given the same group
+are treated as redundant feeds of the same console (e.g. the RTD serial
+port plus the Ethernet RTD broadcast): they write into the same template
+image, and a frame that arrives from one of them shortly after the
+identical frame came from another is dropped, so each frame is applied
+once.
+
+Source specs used on the command line:
+    serial:COM3                 serial port, default ITF
+    serial:/dev/ttyUSB0:OS2-Dive.itf
+    udp:21003                   UDP port, default ITF
+    file:serial_log.bin         replay a capture
+    file:C:\\caps\\meet.bin      Windows paths work for captures and ITFs
+    serial:COM3@pool            serial port in group "pool"
+    udp:21003@pool              redundant feed of the same console
+"""
+import os
+import selectors
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+from newScoreboard import RTDFrameDecoder
+from sport_layouts import LANE_COUNT, SportLayout
+
+
+class TemplateState:
+    """The template image and compiled layout shared by the sources of one group."""
+
+    def __init__(self, itf_path="OS2-Swimming.itf", lanes=LANE_COUNT):
+        self.itf_path = itf_path
+        # True when the ITF came from the defaults/config rather than the spec
+        self.uses_default_itf = False
+        self.layout = SportLayout(itf_path, lanes=lanes)
+        self._pending_layout = None
+        # Current contents of the console's template; frames write into it
+        self.image = self.layout.new_image()
+
+    def swap_layout(self, layout):
+        """
+        Queue a newly compiled layout (from any thread). It is installed by
+        the reader thread just before the next frame is applied, so no
+        frame is ever decoded against a half-swapped layout.
+        """
+        self._pending_layout = layout
+
+    def _install_pending_layout(self):
+        layout, self._pending_layout = self._pending_layout, None
+        image = layout.new_image()
+        if layout.field_defs == self.layout.field_defs:
+            # Same template (e.g. only the lane count changed): keep the board
+            image[:] = self.image
+        else:
+            # Another template: only fields both define, with the same length, carry over
+            old = self.layout.field_slices
+            for name, (start, end) in layout.field_slices.items():
+                a, b = old.get(name, (0, 0))
+                if b - a == end - start:
+                    image[start:end] = self.image[a:b]
+        self.layout, self.image, self.itf_path = layout, image, layout.itf_path
+
+    def apply(self, frame):
+        """
+        Write a frame's payload into the template image at its offset and
+        return the display values it changed (see `SportLayout.update`).
+        Right after a layout swap every display value is returned.
+        """
+        changes = {}
+        if self._pending_layout is not None:
+            self._install_pending_layout()
+            changes = self.layout.render(self.image)
+        end = frame.offset + len(frame.payload)
+        if end > len(self.image):
+            return changes
+        self.image[frame.offset:end] = frame.payload
+        changes.update(self.layout.update(self.image, frame.offset, len(frame.payload)))
+        return changes
+
+    def snapshot(self):
+        """Return every display value for the current template image."""
+        return self.layout.render(self.image)
+
+
+class RTDSource:
+    """
+    Base class: a byte source with its own decoder. The template image and
+    layout live in `state`, which `SourceManager.add` shares between the
+    sources of a group. With `itf_path=None` there is no template state:
+    frames are only decoded and de-duplicated, for callers that interpret
+    the payloads themselves.
+    """
+
+    selectable = False
+
+    def __init__(self, name, itf_path="OS2-Swimming.itf", group=None, lanes=LANE_COUNT):
+        self.name = name
+        self.group = group or name
+        self.decoder = RTDFrameDecoder()
+        self.state = TemplateState(itf_path, lanes) if itf_path else None
+
+    @property
+    def itf_path(self):
+        return self.state.itf_path if self.state else None
+
+    @property
+    def layout(self):
+        return self.state.layout if self.state else None
+
+    @property
+    def uses_default_itf(self):
+        return self.state.uses_default_itf if self.state else False
+
+    def fileno(self):
+        raise NotImplementedError
+
+    def read(self):
+        """Return whatever bytes are available without blocking (b'' if none)."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def swap_layout(self, layout):
+        if self.state:
+            self.state.swap_layout(layout)
+
+    def apply(self, frame):
+        return self.state.apply(frame) if self.state else {}
+
+    def snapshot(self):
+        return self.state.snapshot() if self.state else {}
+
+
+class SerialSource(RTDSource):
+    def __init__(self, port, baudrate=19200, itf_path="OS2-Swimming.itf", group=None, lanes=LANE_COUNT):
+        super().__init__(f"serial:{port}", itf_path, group, lanes)
+        import serial
+        # timeout=0: read() returns immediately with what is buffered
+        self.ser = serial.Serial(port, baudrate, timeout=0)
+        self.selectable = os.name != "nt"
+
+    def fileno(self):
+        return self.ser.fileno()
+
+    def read(self):
+        return self.ser.read(self.ser.in_waiting or 1)
+
+    def close(self):
+        self.ser.close()
+
+
+class UDPSource(RTDSource):
+    selectable = True
+
+    def __init__(self, port, itf_path="OS2-Swimming.itf", group=None, lanes=LANE_COUNT):
+        super().__init__(f"udp:{port}", itf_path, group, lanes)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        self.sock.bind(("", port))
+        self.sock.setblocking(False)
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def read(self):
+        chunks = []
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(4096)
+            except (BlockingIOError, InterruptedError):
+                break
+            chunks.append(data)
+        return b"".join(chunks)
+
+    def close(self):
+        self.sock.close()
+
+
+class FileSource(RTDSource):
+    """Replays a capture file at roughly `bytes_per_second` (19200 baud is ~1920 B/s)."""
+
+    def __init__(self, path, itf_path="OS2-Swimming.itf", group=None, bytes_per_second=1920, lanes=LANE_COUNT):
+        super().__init__(f"file:{path}", itf_path, group, lanes)
+        self.f = open(path, "rb")
+        self.bytes_per_second = bytes_per_second
+        self.started = None
+        self.sent = 0
+        self.finished = False
+
+    def read(self):
+        now = time.monotonic()
+        if self.started is None:
+            self.started = now
+        due = int((now - self.started) * self.bytes_per_second) - self.sent
+        if due <= 0:
+            return b""
+        data = self.f.read(due)
+        if not data:
+            self.finished = True
+        self.sent += len(data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+
+def parse_source_spec(spec):
+    """
+    Split a `kind:address[:itf][@group]` spec (see module docstring) into
+    (kind, address, itf or None, group or None).
+
+    Addresses and ITF paths may be Windows paths (file:C:\\caps\\meet.bin):
+    the part after the last ':' is only the ITF when it ends in .itf, a
+    drive letter in front of it goes with it, and '@' only starts a group
+    name that contains no path separators.
+    """
+    body, at, group = spec.rpartition("@")
+    if not at or any(c in group for c in "/\\:"):
+        body, group = spec, ""
+    kind, _, address = body.partition(":")
+    itf_path = None
+    head, colon, tail = address.rpartition(":")
+    if colon and tail.lower().endswith(".itf"):
+        # serial:COM3:C:\itf\OS2-Dive.itf
+        if len(head) > 2 and head[-2] == ":" and head[-1].isalpha():
+            head, tail = head[:-2], head[-1] + ":" + tail
+        if head:
+            address, itf_path = head, tail
+    elif colon and not tail:
+        address = head
+    if not kind or not address:
+        raise ValueError(f"Bad source spec '{spec}', expected kind:address[:itf][@group]")
+    return kind.lower(), address, itf_path, group or None
+
+
+def source_group(spec):
+    """The group a spec's source joins: its @group, otherwise its own kind:address."""
+    kind, address, _, group = parse_source_spec(spec)
+    return group or f"{kind}:{address}"
+
+
+def make_source(spec, baudrate=19200, default_itf="OS2-Swimming.itf", lanes=LANE_COUNT):
+    """
+    Build a source from a `kind:address[:itf][@group]` spec (see module
+    docstring). With `default_itf=None`, sources without an ITF in their
+    spec get no template state (see `RTDSource`).
+    """
+    kind, address, explicit_itf, _ = parse_source_spec(spec)
+    group = source_group(spec)
+    itf_path = explicit_itf or default_itf
+    if kind == "serial":
+        source = SerialSource(address, baudrate, itf_path, group, lanes=lanes)
+    elif kind == "udp":
+        source = UDPSource(int(address), itf_path, group, lanes=lanes)
+    elif kind == "file":
+        source = FileSource(address, itf_path, group, bytes_per_second=baudrate // 10, lanes=lanes)
+    else:
+        raise ValueError(f"Unknown source kind '{kind}' in '{spec}'")
+    if source.state:
+        source.state.uses_default_itf = explicit_itf is None
+    return source
+
+
+class FrameDeduplicator:
+    """
+    Drops a frame when a different source in the same group delivered the
+    same frame (sequence, offset, checksum and payload) within `window`
+    seconds. Repeats from the same source are always kept, since the
+    console legitimately resends identical frames (e.g. a stopped clock).
+    """
+
+    def __init__(self, window=0.5, max_entries=4096):
+        self.window = window
+        self.max_entries = max_entries
+        self.seen = OrderedDict()   # key -> (source name, time)
+        self.dropped = 0
+
+    def is_duplicate(self, source, frame, now=None):
+        if now is None:
+            now = time.monotonic()
+        key = (source.group, frame.sequence, frame.offset, frame.checksum, frame.payload)
+        previous = self.seen.get(key)
+        if previous is not None and previous[0] != source.name and now - previous[1] < self.window:
+            self.dropped += 1
+            return True
+        self.seen[key] = (source.name, now)
+        self.seen.move_to_end(key)
+        # Entries are kept in arrival order, so expire from the front
+        while self.seen:
+            oldest_key, (_, t) = next(iter(self.seen.items()))
+            if now - t < self.window and len(self.seen) <= self.max_entries:
+                break
+            del self.seen[oldest_key]
+        return False
+
+
+class SourceManager:
+    """
+    Services any number of sources from one thread.
+
+    `on_frame(source, frame, changes)` is called from that thread for
+    every de-duplicated frame, after the frame has been applied to the
+    group's template image. `changes` holds only the display values
+    the frame affected. Errors go to `log` (print-compatible), so a
+    long session can pass a `ConsoleLimiter`.
+    """
+
+    def __init__(self, on_frame, dedup_window=0.5, poll_interval=0.01, log=print):
+        self.on_frame = on_frame
+        self.log = log
+        self.dedup = FrameDeduplicator(dedup_window)
+        self.poll_interval = poll_interval
+        self.sources = []
+        self.groups = {}    # group name -> TemplateState shared by its sources
+        self.running = False
+        self.thread = None
+        self._selector = None
+        self._polled = []
+
+    def add(self, source):
+        """Register a source; sources of an existing group take over its template state."""
+        state = self.groups.get(source.group)
+        if source.state is None:
+            pass
+        elif state is None:
+            self.groups[source.group] = source.state
+        elif os.path.abspath(state.itf_path) != os.path.abspath(source.itf_path):
+            source.close()
+            raise ValueError(f"{source.name}: group '{source.group}' already uses {state.itf_path}, "
+                             f"not {source.itf_path}")
+        else:
+            source.state = state
+        self.sources.append(source)
+        return source
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1.0)
+        for source in self.sources:
+            self._close(source)
+
+    def _close(self, source):
+        try:
+            source.close()
+        except Exception as e:
+            self.log(f"{source.name}: close error: {e}")
+
+    def _drop(self, source):
+        """Stop servicing a source whose reads fail (e.g. an unplugged USB adapter)."""
+        if source in self._polled:
+            self._polled.remove(source)
+        else:
+            try:
+                self._selector.unregister(source)
+            except (KeyError, ValueError):
+                pass
+        self.sources.remove(source)
+        self._close(source)
+
+    def _service(self, source):
+        try:
+            data = source.read()
+        except Exception as e:
+            self.log(f"{source.name}: read error: {e}; source closed")
+            self._drop(source)
+            return
+        if not data:
+            return
+        for frame in source.decoder.feed(data):
+            if self.dedup.is_duplicate(source, frame):
+                continue
+            changes = source.apply(frame)
+            try:
+                self.on_frame(source, frame, changes)
+            except Exception as e:
+                self.log(f"{source.name}: frame handler error: {e}")
+
+    def run(self):
+        self._selector = selector = selectors.DefaultSelector()
+        self._polled = polled = []
+        for source in self.sources:
+            if source.selectable:
+                selector.register(source, selectors.EVENT_READ)
+            else:
+                polled.append(source)
+        try:
+            # Ends once every source has finished or been dropped
+            while self.running and (polled or selector.get_map()):
+                # Only block for the whole interval when nothing needs polling
+                timeout = self.poll_interval if polled else 0.5
+                if selector.get_map():
+                    for key, _ in selector.select(timeout):
+                        self._service(key.fileobj)
+                else:
+                    time.sleep(timeout)
+                for source in list(polled):
+                    self._service(source)
+                if polled and all(getattr(s, "finished", False) for s in polled) and not selector.get_map():
+                    break
+        finally:
+            selector.close()
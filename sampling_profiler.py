@@ -0,0 +1,201 @@
+"""
+Low-overhead sampling profiler for the scoreboards (`--profile`).
+
+A background thread wakes every `interval` seconds, grabs the current
+Python stack of each watched thread (`sys._current_frames()`), and
+counts it. The watched code is not instrumented, so nothing is added to
+the reader or Tk hot paths; the cost is one stack walk per thread per
+sample.
+
+Each sample is tagged with the pipeline stage of its innermost
+recognised function:
+  read      waiting for / reading bytes (serial port, replay file)
+  framing   RTD frame decoding and checksum
+  parse     ITF field extraction and layout updates
+  dispatch  routing frames to the board (reader callbacks, Tk callbacks)
+  render    widget updates (label config, lane rows, heat transitions)
+  loop      in the event loop: Tcl redrawing or waiting for events (or
+            the --headless stand-in waiting for callbacks)
+  other     anything else
+
+The sampler only runs while it holds the GIL, so every other thread is
+seen where it last released it. A thread that does short bursts of work
+and then blocks (the Tk loop between frames) is mostly seen blocked; a
+busy thread (the reader during a fast replay) is sampled throughout its
+work. Compare stages within a thread rather than across threads.
+
+At shutdown `write_folded()` writes one line per distinct stack in the
+"folded" format read by flamegraph.pl, speedscope and inferno:
+
+    reader;framing;_read_loop (gbs-swim-scoreboard.py:410);feed (newScoreboard.py:157) 42
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# (file name, function name) -> stage; the innermost match in a stack wins
+STAGE_FUNCTIONS = {
+    "read": [
+        ("gbs-swim-scoreboard.py", "_read_loop"),
+        ("newScoreboard.py", "read_serial_available"),
+        ("rtd_sources.py", "run"),
+        ("rtd_sources.py", "read"),
+        ("scoreboard_ui.py", "demo_feeder"),
+        ("serialposix.py", "read"),
+        ("serialposix.py", "read_until"),
+        ("serialutil.py", "read_until"),
+        ("serialwin32.py", "read"),
+        ("selectors.py", "select"),
+    ],
+    "framing": [
+        ("newScoreboard.py", "feed"),
+        ("newScoreboard.py", "_scan"),
+        ("newScoreboard.py", "_header_state"),
+        ("newScoreboard.py", "_compact"),
+        ("newScoreboard.py", "_discard_to"),
+        ("newScoreboard.py", "parse_rtd_frame"),
+        ("newScoreboard.py", "rtd_checksum"),
+    ],
+    "parse": [
+        ("gbs-swim-scoreboard.py", "parse_frame"),
+        ("rtd_sources.py", "apply"),
+        ("sport_layouts.py", "update"),
+        ("sport_layouts.py", "render"),
+        ("newScoreboard.py", "parse_rtd_packet"),
+        ("newScoreboard.py", "parse_rtd_bytes_with_defs"),
+        ("newScoreboard.py", "map_itf_parsed_to_rtd"),
+    ],
+    "dispatch": [
+        ("gbs-swim-scoreboard.py", "_handle_bytes"),
+        ("gbs-swim-scoreboard.py", "on_frame"),
+        ("gbs-swim-scoreboard.py", "on_data"),
+        ("gbs-swim-scoreboard.py", "on_source_frame"),
+        ("gbs-swim-scoreboard.py", "<lambda>"),
+        ("rtd_sources.py", "_service"),
+        ("rtd_sources.py", "is_duplicate"),
+        ("scoreboard_ui.py", "on_frame"),
+        ("scoreboard_ui.py", "_poll_queue"),
+        ("tkinter/__init__.py", "__call__"),
+    ],
+    "render": [
+        ("gbs-swim-scoreboard.py", "set_text"),
+        ("gbs-swim-scoreboard.py", "update_lane"),
+        ("gbs-swim-scoreboard.py", "commit"),
+        ("gbs-swim-scoreboard.py", "set_lane_count"),
+        ("gbs-swim-scoreboard.py", "_on_resize"),
+        ("scoreboard_ui.py", "update_from_parsed"),
+        ("scoreboard_ui.py", "set_lane_count"),
+        ("tkinter/__init__.py", "configure"),
+        ("tkinter/__init__.py", "cget"),
+        ("tkinter/__init__.py", "update"),
+        ("tkinter/__init__.py", "update_idletasks"),
+        ("tkinter/font.py", "configure"),
+    ],
+    "loop": [
+        ("tkinter/__init__.py", "mainloop"),
+        ("gbs-swim-scoreboard.py", "run"),
+    ],
+}
+
+_STAGE_BY_FUNCTION = {}
+for _stage, _functions in STAGE_FUNCTIONS.items():
+    for _file, _name in _functions:
+        _STAGE_BY_FUNCTION[(_file, _name)] = _stage
+
+
+def _code_key(code):
+    # "tkinter/__init__.py" keeps the package so it does not match every __init__.py
+    parent, name = os.path.split(code.co_filename)
+    if name == "__init__.py" or os.path.basename(parent) == "tkinter":
+        name = os.path.basename(parent) + "/" + name
+    return name, code.co_name
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of the threads given to `watch()` until `stop()`.
+    Stacks are kept as tuples of code objects and only turned into text
+    when the report is written.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()    # (thread name, stage, stack) -> count
+        self.threads = {}           # thread ident -> name
+        self.started = None
+        self.elapsed = 0.0
+        self.ticks = 0
+        self._stages = {}           # code object -> stage or None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def watch(self, thread, name):
+        """Sample `thread` (a started threading.Thread) under `name`."""
+        self.threads[thread.ident] = name
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+        if self.started is not None:
+            self.elapsed = time.perf_counter() - self.started
+
+    def _stage_of(self, stack):
+        for code in reversed(stack):
+            stage = self._stages.get(code, False)
+            if stage is False:
+                stage = self._stages[code] = _STAGE_BY_FUNCTION.get(_code_key(code))
+            if stage:
+                return stage
+        return "other"
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.ticks += 1
+            frames = sys._current_frames()
+            for ident, name in list(self.threads.items()):
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                stack.reverse()
+                stack = tuple(stack)
+                self.samples[(name, self._stage_of(stack), stack)] += 1
+
+    def write_folded(self, path):
+        """Write the samples as folded stacks (one `frame;frame;... count` line per stack)."""
+        lines = Counter()
+        for (name, stage, stack), count in self.samples.items():
+            frames = [f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})" for code in stack]
+            lines[";".join([name, stage] + frames)] += count
+        with open(path, "w", encoding="utf-8") as f:
+            for line, count in sorted(lines.items()):
+                f.write(f"{line} {count}\n")
+
+    def summary(self):
+        """Share of samples per stage for each watched thread."""
+        per_thread = {}
+        for (name, stage, _), count in self.samples.items():
+            per_thread.setdefault(name, Counter())[stage] += count
+        out = [f"Profiled {self.elapsed:.1f} s, {self.ticks} ticks every {self.interval * 1000:g} ms"]
+        for name, stages in per_thread.items():
+            total = sum(stages.values())
+            parts = ", ".join(f"{stage} {100 * n / total:.1f}%" for stage, n in stages.most_common())
+            out.append(f"  {name} ({total} samples): {parts}")
+        return "\n".join(out)
+
+    def finish(self, path):
+        """Stop sampling, write the folded report to `path` and print the summary."""
+        self.stop()
+        self.write_folded(path)
+        print(self.summary())
+        print(f"Folded stacks written to {path} (flamegraph.pl, speedscope or inferno)")
@@ -1,11 +1,12 @@
 import threading
-import socket
-import queue
 import argparse
 import time
-from tkinter import Tk, Frame, Label, BOTH, LEFT, RIGHT, X
+from tkinter import Tk, Toplevel, Frame, Label, BOTH, LEFT, RIGHT, X
 
-from newScoreboard import parse_rtd_packet, parse_rtd_from_serial, map_itf_parsed_to_rtd
+from hot_reload import TemplateWatcher, load_display_config
+
+# newScoreboard, sport_layouts and rtd_sources are imported where they are
+# used, after the window has been drawn, so a relaunch paints immediately.
 
 # Color palette
 BG_COLOR = "#FFFFFF"        # white background
@@ -93,8 +94,31 @@ def _split_name_and_time(raw: str):
     return s, None
 
 
+class LatestUpdates:
+    """
+    Hand-off from the reader threads to the Tk thread that cannot grow:
+    updates put between two polls are merged key by key, so the newest
+    value of each display field wins and at most one update per field is
+    held, however far the UI falls behind.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def put(self, update):
+        with self._lock:
+            self._pending.update(update)
+
+    def take(self):
+        """Return the merged update since the last call ({} if none)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+
 class ScoreboardUI:
-    def __init__(self, root):
+    def __init__(self, root, lane_count=8):
         self.root = root
         root.title("Scoreboard")
         root.configure(bg=BG_COLOR)
@@ -120,13 +144,24 @@ class ScoreboardUI:
         self.lanes_frame = Frame(root, bg=BG_COLOR)
         self.lanes_frame.pack(fill=BOTH, expand=True, padx=8, pady=6)
 
+        self._build_lanes(lane_count)
+
+        self._event_num = ""
+        self._heat_num = ""
+        self.q = LatestUpdates()
+
+    def _build_lanes(self, lane_count):
+        self.lane_count = lane_count
+        self.lane_frames = []
         self.lane_labels = []         # left-side lane name labels
+        self.lane_name_labels = []    # middle swimmer name labels
         self.lane_value_labels = []   # right-side lane value/time labels
 
-        for i in range(8):
+        for i in range(lane_count):
             bg = LANE_BG_1 if (i % 2 == 0) else LANE_BG_2
             f = Frame(self.lanes_frame, bd=1, relief="solid", padx=6, pady=6, bg=bg)
             f.pack(fill=X, pady=2)
+            self.lane_frames.append(f)
 
             # Left label: lane number
             lane_label = Label(f, text=f"Lane {i+1}", font=("Helvetica", 18), bg=bg, fg=LANE_TEXT)
@@ -136,8 +171,6 @@ class ScoreboardUI:
             # Middle label: swimmer name (left-aligned, expands)
             name_label = Label(f, text="", font=("Helvetica", 18), bg=bg, fg=LANE_TEXT, anchor="w")
             name_label.pack(side=LEFT, fill=X, expand=True, padx=(8, 8))
-            if not hasattr(self, 'lane_name_labels'):
-                self.lane_name_labels = []
             self.lane_name_labels.append(name_label)
 
             # Right label: lane time/value (right-aligned)
@@ -145,98 +178,72 @@ class ScoreboardUI:
             value_label.pack(side=RIGHT)
             self.lane_value_labels.append(value_label)
 
-        self.q = queue.Queue()
+    def set_lane_count(self, lane_count):
+        """Rebuild the lane rows for a new lane count, keeping what lanes already show."""
+        if lane_count == self.lane_count:
+            return
+        shown = [(n.cget("text"), v.cget("text")) for n, v in zip(self.lane_name_labels, self.lane_value_labels)]
+        for f in self.lane_frames:
+            f.destroy()
+        self._build_lanes(lane_count)
+        for (name, value), name_label, value_label in zip(shown, self.lane_name_labels, self.lane_value_labels):
+            name_label.config(text=name)
+            value_label.config(text=value)
 
     def start_poll(self, interval_ms=100):
         self._poll_interval_ms = interval_ms
         self._poll_queue()
 
     def _poll_queue(self):
-        try:
-            while True:
-                parsed = self.q.get_nowait()
-                self.update_from_parsed(parsed)
-        except queue.Empty:
-            pass
+        parsed = self.q.take()
+        if parsed:
+            self.update_from_parsed(parsed)
         self.root.after(self._poll_interval_ms, self._poll_queue)
 
     def update_from_parsed(self, p):
-        self.event_title_1.config(text=p.get("event_title_1", ""))
-        self.event_title_2.config(text=p.get("event_title_2", ""))
-        self.running_time.config(text=p.get("running_time", ""))
-        event_num = p.get("event_number", "")
-        heat_num = p.get("heat_number", "")
-        self.meta_label.config(text=f"Event: {event_num}  Heat: {heat_num}")
-
-        for i in range(8):
+        # Only the keys present in `p` are updated, so a partial update
+        # (the values one frame changed) leaves the rest of the board alone.
+        if "lane_count" in p:
+            self.set_lane_count(p["lane_count"])
+        if "event_title_1" in p:
+            self.event_title_1.config(text=p["event_title_1"])
+        if "event_title_2" in p:
+            self.event_title_2.config(text=p["event_title_2"])
+        if "running_time" in p:
+            self.running_time.config(text=p["running_time"])
+        if "event_number" in p or "heat_number" in p:
+            self._event_num = p.get("event_number", self._event_num)
+            self._heat_num = p.get("heat_number", self._heat_num)
+            self.meta_label.config(text=f"Event: {self._event_num}  Heat: {self._heat_num}")
+
+        # Dive / water polo lanes carry scores or penalty times, not swim times
+        text_values = p.get("lane_format") == "text"
+
+        for i in range(self.lane_count):
             key = f"lane_{i+1}"
-            raw = p.get(key, "")
-
-            name, ms = _split_name_and_time(raw)
-            if ms is None:
-                # if no ms, show raw as name if name empty
-                if not name:
-                    name = ""
-                display = "---"
+            if key not in p:
+                continue
+            raw = p[key]
+
+            if text_values:
+                name = p.get(f"{key}_name", "")
+                display = p.get(f"{key}_value", "") or "---"
             else:
-                display = _format_ms_as_mm_ss_ms(ms)
+                name, ms = _split_name_and_time(raw)
+                if ms is None:
+                    # if no ms, show raw as name if name empty
+                    if not name:
+                        name = ""
+                    display = "---"
+                else:
+                    display = _format_ms_as_mm_ss_ms(ms)
 
             # update left lane number, middle name, and right-side time
             self.lane_labels[i].config(text=f"Lane {i+1}")
-            # ensure lane_name_labels list exists (older versions may not have it)
-            if hasattr(self, 'lane_name_labels'):
-                self.lane_name_labels[i].config(text=name)
+            self.lane_name_labels[i].config(text=name)
             self.lane_value_labels[i].config(text=display)
 
 
-def udp_listener(port, out_queue, stop_event):
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-    sock.bind(("", port))
-    sock.settimeout(1.0)
-
-    while not stop_event.is_set():
-        try:
-            data, addr = sock.recvfrom(4096)
-        except socket.timeout:
-            continue
-        try:
-            parsed = parse_rtd_packet(data)
-            out_queue.put(parsed)
-        except Exception:
-            continue
-
-
-def serial_listener(port_name, out_queue, stop_event, baudrate=9600, itf_path="OS2-Swimming.itf", interval=0.1):
-    """
-    Poll a serial port for RTD data and push parsed dictionaries to `out_queue`.
-
-    This uses `parse_rtd_from_serial` from `newScoreboard.py`, which will
-    attempt to read a full record (based on the .itf layout). The listener
-    loops until `stop_event` is set. `interval` controls sleep between polls
-    when no data is available.
-    """
-    while not stop_event.is_set():
-        try:
-            parsed = parse_rtd_from_serial(port_name, baudrate=baudrate, itf_path=itf_path)
-            if parsed:
-                # If parse_rtd_from_serial returns ITF-named fields, map them
-                # to the RTD keys expected by the UI.
-                try:
-                    mapped = map_itf_parsed_to_rtd(parsed)
-                except Exception:
-                    mapped = parsed
-
-                out_queue.put(mapped)
-            else:
-                # no data read; sleep briefly to avoid busy-loop
-                time.sleep(interval)
-        except Exception:
-            # ignore transient errors and keep trying until stop_event
-            time.sleep(interval)
-
-
 def demo_feeder(out_queue, stop_event, interval=0.01):
     i = 0
     # sample swimmer names for demo
@@ -287,35 +294,154 @@ def main():
     parser.add_argument("--serial-port", type=str, help="Serial port to read RTD from (e.g., COM3)")
     parser.add_argument("--baudrate", type=int, default=9600, help="Serial baud rate")
     parser.add_argument("--itf", type=str, default="OS2-Swimming.itf", help="Path to .itf field definition file")
+    parser.add_argument("--source", action="append", default=[],
+                        help="RTD source as kind:address[:itf][@group], e.g. serial:COM3, udp:21003, "
+                             "serial:COM4:OS2-Dive.itf. Repeat for several consoles; sources with the same @group "
+                             "are redundant feeds of one console. Overrides --demo/--serial-port/--port")
+    parser.add_argument("--config", type=str, help="Display config (INI with [display] lane_count, itf); "
+                                                   "edits to it or to the ITF are picked up without restarting")
+    parser.add_argument("--exit-after-paint", action="store_true",
+                        help='Print "first paint" once the window is drawn and exit (used by bench_startup.py)')
+    parser.add_argument("--long-session", action="store_true",
+                        help="Rate-limit console messages from the sources for an all-day meet")
+    parser.add_argument("--profile", nargs="?", const="ui-profile.folded", metavar="PATH",
+                        help="Sample the reader thread and the Tk main loop; write folded stacks for a "
+                             "flame graph to PATH at exit (default: ui-profile.folded)")
     args = parser.parse_args()
+    if not (args.source or args.demo):
+        # A single console is just one source, so it gets the sport layouts too
+        args.source = [f"serial:{args.serial_port}" if args.serial_port else f"udp:{args.port}"]
+
+    config = load_display_config(args.config, default_itf=args.itf)
 
     root = Tk()
-    ui = ScoreboardUI(root)
+    ui = ScoreboardUI(root, lane_count=config["lane_count"])
+    # Draw the empty board before loading templates or opening ports
+    root.update()
+    if args.exit_after_paint:
+        print("first paint", flush=True)
+        root.destroy()
+        return
+
+    profiler = None
+    if args.profile:
+        from sampling_profiler import SamplingProfiler
+        profiler = SamplingProfiler()
+        profiler.watch(threading.main_thread(), "main loop")
+        profiler.start()
 
     stop_event = threading.Event()
-
-    # Priority: demo -> serial -> udp
-    if args.demo:
-        t = threading.Thread(target=demo_feeder, args=(ui.q, stop_event), daemon=True)
-        t.start()
-    elif args.serial_port:
-        t = threading.Thread(
-            target=serial_listener,
-            args=(args.serial_port, ui.q, stop_event),
-            kwargs={"baudrate": args.baudrate, "itf_path": args.itf},
-            daemon=True,
-        )
-        t.start()
+    manager = None
+    watcher = None
+    # Source group -> its board; each console gets its own window
+    boards = {}
+
+    def start_watcher():
+        if not (args.config or manager):
+            return None
+
+        def watched_paths():
+            paths = [args.config, load_display_config(args.config, default_itf=args.itf)["itf"]]
+            if manager:
+                paths += [state.itf_path for state in manager.groups.values()]
+            return paths
+
+        def build_layouts():
+            # Runs on the watcher thread so the UI and readers never wait on it
+            from sport_layouts import SportLayout
+            cfg = load_display_config(args.config, default_itf=args.itf)
+            layouts = []
+            if manager:
+                # One layout per group; its sources share the template image
+                for state in list(manager.groups.values()):
+                    itf_path = cfg["itf"] if state.uses_default_itf else state.itf_path
+                    layouts.append((state, SportLayout(itf_path, lanes=cfg["lane_count"])))
+            return cfg, layouts
+
+        def install_layouts(built):
+            cfg, layouts = built
+            for state, layout in layouts:
+                state.swap_layout(layout)
+            for board in boards.values() or [ui]:
+                board.q.put({"lane_count": cfg["lane_count"]})
+
+        w = TemplateWatcher(watched_paths, build_layouts, install_layouts)
+        w.start()
+        return w
+
+    def start_sources():
+        # Compiles each source's ITF and opens its port off the Tk thread
+        nonlocal watcher
+        from rtd_sources import make_source
+        for spec in args.source:
+            # One console failing to open (e.g. a busy COM port) must not stop the rest
+            try:
+                manager.add(make_source(spec, baudrate=args.baudrate, default_itf=config["itf"], lanes=config["lane_count"]))
+            except Exception as e:
+                manager.log(f"Error starting source {spec}: {e}")
+        manager.start()
+        if profiler:
+            profiler.watch(manager.thread, "reader")
+        # Started once the sources exist, so their ITFs are in the first snapshot
+        watcher = start_watcher()
+
+    # Priority: sources -> demo -> serial -> udp (the last two as sources)
+    if args.source:
+        from rtd_sources import SourceManager, source_group
+
+        groups = []
+        for spec in args.source:
+            try:
+                group = source_group(spec)
+            except ValueError:
+                continue    # reported by start_sources
+            if group not in groups:
+                groups.append(group)
+        for group in groups:
+            if not boards:
+                board = ui
+            else:
+                window = Toplevel(root)
+                # Closing one console's window would stop the others too
+                window.protocol("WM_DELETE_WINDOW", window.iconify)
+                board = ScoreboardUI(window, lane_count=config["lane_count"])
+            if len(groups) > 1:
+                board.root.title(f"Scoreboard - {group}")
+            boards[group] = board
+
+        def on_frame(source, frame, changes):
+            board = boards.get(source.group)
+            if changes and board:
+                board.q.put(changes)
+
+        log = print
+        if args.long_session:
+            from long_session import ConsoleLimiter
+            log = ConsoleLimiter()
+        manager = SourceManager(on_frame, log=log)
+        threading.Thread(target=start_sources, daemon=True).start()
     else:
-        t = threading.Thread(target=udp_listener, args=(args.port, ui.q, stop_event), daemon=True)
+        t = threading.Thread(target=demo_feeder, args=(ui.q, stop_event), daemon=True)
         t.start()
+        if profiler:
+            profiler.watch(t, "reader")
+
+    if not manager:
+        watcher = start_watcher()
 
-    ui.start_poll(10)
+    for board in boards.values() or [ui]:
+        board.start_poll(10)
 
     try:
         root.mainloop()
     finally:
         stop_event.set()
+        if watcher:
+            watcher.stop()
+        if manager:
+            manager.stop()
+        if profiler:
+            profiler.finish(args.profile)
 
 
 if __name__ == "__main__":
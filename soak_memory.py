@@ -0,0 +1,225 @@
+"""
+Memory soak test for long sessions.
+
+Replays one or more captures in a loop, as fast as possible, through the
+pieces that stay alive for a whole meet:
+  - gbs-swim-scoreboard.py's own path: SerialReceiver's frame handling,
+    OS2FrameParser, the board's on_data/on_frame and heat transitions
+    (HeadlessScoreboard, its after() callbacks run between chunks), and
+    the latency hooks
+  - the --source path: two redundant sources in one group sharing a
+    template image, with de-duplication between them (SourceManager)
+  - the rotating serial capture log and the console limiter
+The capture's own line rate (19200 baud, ~1920 bytes/s) sets how much
+simulated meet time each pass covers.
+
+After a warm-up pass it records traced Python memory (tracemalloc), the
+number of live objects and resident memory, checks them again at regular
+points, and exits with status 1 if any of them grew past its threshold,
+listing the allocation sites that grew most.
+
+Usage:
+    python soak_memory.py --hours 4
+    python soak_memory.py capture1.bin capture2.bin --hours 8 --max-growth-kb 256
+"""
+import argparse
+import gc
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from long_session import ConsoleLimiter, LatencyStats, RotatingCaptureLog
+from rtd_sources import RTDSource, SourceManager
+
+
+def resident_bytes():
+    """Current resident set size (working set on Windows), or None if it cannot be read."""
+    if os.name == "nt":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                    "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        try:
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+        except (OSError, AttributeError):
+            pass
+        return None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def measure():
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    return {
+        "traced": current,
+        "objects": len(gc.get_objects()),
+        "rss": resident_bytes(),
+        "snapshot": tracemalloc.take_snapshot(),
+    }
+
+
+def load_swim_board():
+    """Import gbs-swim-scoreboard.py, whose file name is not a module name."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gbs-swim-scoreboard.py")
+    spec = importlib.util.spec_from_file_location("gbs_swim_scoreboard", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class ReplaySource(RTDSource):
+    """A source fed by the soak loop: read() returns the chunk given to push()."""
+
+    def __init__(self, name, itf_path, group):
+        super().__init__(name, itf_path, group)
+        self.pending = b""
+
+    def push(self, data):
+        self.pending = data
+
+    def read(self):
+        data, self.pending = self.pending, b""
+        return data
+
+
+class SoakPipeline:
+    """The long-lived state of one scoreboard session, fed raw capture bytes."""
+
+    def __init__(self, itf_path, capture_path, log_dir, log_max_bytes, lanes=8, transition_ms=1500, chunk=256):
+        self.console = ConsoleLimiter(out=lambda *args, **kwargs: None)
+        self.capture_log = RotatingCaptureLog(os.path.join(log_dir, "serial_log.bin"), max_bytes=log_max_bytes)
+        self.chunk = chunk
+        self.frames = 0
+
+        gbs = load_swim_board()
+        # The board's per-frame messages, as with --long-session
+        gbs.log = self.console
+        self.board = board = gbs.HeadlessScoreboard(lane_count=lanes, transition_ms=transition_ms)
+        board.latency = LatencyStats(window=10000)
+        parser = board.frame_parser = gbs.OS2FrameParser(itf_path)
+        # Wired as SwimScoreboard.start_serial does for --test-file; the
+        # soak loop hands it the bytes instead of the reader thread
+        self.receiver = gbs.SerialReceiver(None, 19200, parser,
+                                           lambda frame: board.after(0, board.on_frame, frame),
+                                           lambda data: board.after(0, board.on_data, data),
+                                           test_file=capture_path, on_decoded=board._frame_decoded,
+                                           capture_log=self.capture_log)
+
+        self.manager = SourceManager(self._on_source_frame, log=self.console)
+        for name in ("primary", "backup"):
+            self.manager.add(ReplaySource(name, itf_path, group="soak"))
+
+    def _on_source_frame(self, source, frame, changes):
+        self.frames += 1
+        self.console(f"{source.name}: {len(changes)} values changed")
+
+    def feed(self, data):
+        for pos in range(0, len(data), self.chunk):
+            chunk = data[pos:pos + self.chunk]
+            self.capture_log.write(chunk)
+            self.receiver._handle_bytes(chunk)
+            self.board.run_pending()
+            for source in self.manager.sources:
+                source.push(chunk)
+                self.manager._service(source)
+        self.capture_log.flush()
+
+    @property
+    def board_frames(self):
+        return self.receiver.decoder.frames_decoded
+
+    def close(self):
+        self.capture_log.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captures for hours of simulated meet time and check memory stays flat")
+    parser.add_argument("captures", nargs="*", default=["serial_log-12-27-2025-data-for-test.bin"], help="Captures to replay in turn")
+    parser.add_argument("--itf", default="OS2-Swimming.itf", help="ITF template for the board and the sources")
+    parser.add_argument("--hours", type=float, default=4.0, help="Simulated meet time to replay")
+    parser.add_argument("--bytes-per-second", type=float, default=1920, help="Line rate used to convert bytes to meet time")
+    parser.add_argument("--checkpoints", type=int, default=8, help="How many times to measure during the run")
+    parser.add_argument("--log-max-mb", type=float, default=1.0, help="Capture log rotation size")
+    parser.add_argument("--max-growth-kb", type=float, default=512, help="Allowed growth of traced memory")
+    parser.add_argument("--max-object-growth", type=int, default=2000, help="Allowed growth in live objects")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=32, help="Allowed growth of resident memory")
+    args = parser.parse_args()
+
+    captures = []
+    for path in args.captures:
+        with open(path, "rb") as f:
+            captures.append(f.read())
+    pass_seconds = sum(len(c) for c in captures) / args.bytes_per_second
+    passes = max(2, int(args.hours * 3600 / pass_seconds + 0.5))
+    every = max(1, (passes - 1) // args.checkpoints)
+
+    tracemalloc.start(10)
+    with tempfile.TemporaryDirectory() as log_dir:
+        pipeline = SoakPipeline(args.itf, args.captures[0], log_dir, int(args.log_max_mb * 1024 * 1024))
+        sim = 0.0
+
+        def replay():
+            nonlocal sim
+            for data in captures:
+                pipeline.feed(data)
+                sim += len(data) / args.bytes_per_second
+
+        t0 = time.perf_counter()
+        replay()
+        baseline = measure()
+        print(f"{passes} passes of {pass_seconds / 60:.1f} min ({passes * pass_seconds / 3600:.1f} h simulated)")
+        print(f"{'sim h':>6} {'board frames':>12} {'source frames':>13} {'traced KB':>10} {'objects':>8} {'RSS MB':>7} {'log rotations':>14}")
+
+        failures = []
+        for n in range(1, passes):
+            replay()
+            if n % every and n != passes - 1:
+                continue
+            m = measure()
+            rss = f"{m['rss'] / 2**20:7.1f}" if m["rss"] else "    n/a"
+            print(f"{sim / 3600:6.2f} {pipeline.board_frames:12d} {pipeline.frames:13d} {m['traced'] / 1024:10.1f} {m['objects']:8d} {rss} "
+                  f"{pipeline.capture_log.rotations:14d}")
+        elapsed = time.perf_counter() - t0
+        pipeline.close()
+
+    traced_growth = (m["traced"] - baseline["traced"]) / 1024
+    object_growth = m["objects"] - baseline["objects"]
+    if traced_growth > args.max_growth_kb:
+        failures.append(f"traced memory grew {traced_growth:.1f} KB (limit {args.max_growth_kb:g})")
+    if object_growth > args.max_object_growth:
+        failures.append(f"live objects grew by {object_growth} (limit {args.max_object_growth})")
+    if m["rss"] and baseline["rss"]:
+        rss_growth = (m["rss"] - baseline["rss"]) / 2**20
+        if rss_growth > args.max_rss_growth_mb:
+            failures.append(f"resident memory grew {rss_growth:.1f} MB (limit {args.max_rss_growth_mb:g})")
+    else:
+        print("Resident memory could not be read on this platform; RSS growth was not checked")
+
+    print(f"{pipeline.board_frames} board and {pipeline.frames} source frames in {elapsed:.1f} s; traced {traced_growth:+.1f} KB, objects {object_growth:+d} after warm-up")
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        print("Largest growth by allocation site:")
+        for stat in m["snapshot"].compare_to(baseline["snapshot"], "lineno")[:10]:
+            print(f"  {stat}")
+        sys.exit(1)
+    print("OK: memory stayed within bounds")
+
+
+if __name__ == "__main__":
+    main()
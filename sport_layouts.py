@@ -0,0 +1,222 @@
+"""
+Sport-agnostic display layouts compiled from ITF templates.
+
+A sport profile says which ITF fields feed each value shown on the
+board (header lines, running clock, per-lane name and value). When a
+template is loaded the profile is compiled against it: every field name
+is resolved to a fixed slice of the template image and every slice
+knows which display values depend on it. Decoding a frame is then a
+bisect over field offsets plus a few slices, with no name lookups.
+
+The display keys are the ones `scoreboard_ui` already uses:
+`running_time`, `event_title_1`, `event_title_2`, `event_number`,
+`heat_number` and `lane_1`..`lane_N` ("<name> <value>"), plus
+`lane_N_name`, `lane_N_value` and `lane_format` ("time" when lane
+values are swim times, "text" otherwise).
+"""
+import os
+from bisect import bisect_right
+
+from newScoreboard import load_itf_field_defs
+
+LANE_COUNT = 8
+
+
+def _alt(fmt, *fields):
+    """One way to build a display value: a format string and the ITF fields it takes."""
+    return (fmt, fields)
+
+
+def _swimming(lanes):
+    return {
+        "lane_format": "time",
+        "header": {
+            "running_time": [_alt("{0}", "Running Time")],
+            "event_title_1": [_alt("{0}", "Event Title Line 1"), _alt("{0}", "Event Title Lines 1 & 2")],
+            "event_title_2": [_alt("{0}", "Event Title Line 2")],
+            "event_number": [_alt("{0}", "Event Number")],
+            "heat_number": [_alt("{0}", "Heat Number")],
+        },
+        "lanes": [
+            (
+                [_alt("{0}", f"Line {i} Swimmer Name"), _alt("{0}", "Single Line Swimmer Name")],
+                [_alt("{0}", f"Line {i} Split/Finish Time")],
+            )
+            for i in range(1, lanes + 1)
+        ],
+    }
+
+
+def _diving(lanes):
+    return {
+        "lane_format": "text",
+        "header": {
+            "running_time": [_alt("{0}", "Award Score"), _alt("{0}", "Current Total Score")],
+            "event_title_1": [_alt("{0}", "Event Name")],
+            "event_title_2": [_alt("{0} {1}  {2}", "Current Diver Name", "Current Team Name", "Current Description")],
+            "event_number": [_alt("{0}{1}", "Event Number - Numeric", "Event Number - Alpha")],
+            "heat_number": [_alt("{0}", "Event Current Round")],
+        },
+        "lanes": [
+            (
+                [_alt("{0}", f"Position {i} Diver Name")],
+                [_alt("{0}", f"Position {i} Total Score")],
+            )
+            for i in range(1, lanes + 1)
+        ],
+    }
+
+
+def _water_polo(lanes):
+    # Three penalty slots per team fill the first six rows
+    penalties = [("Home", n) for n in (1, 2, 3)] + [("Guest", n) for n in (1, 2, 3)]
+    return {
+        "lane_format": "text",
+        "header": {
+            "running_time": [_alt("{0}", "Period Time")],
+            "event_title_1": [_alt("Home {0} - Guest {1}", "Home Score", "Guest Score")],
+            "event_title_2": [_alt("Shot {0}", "Shot Time")],
+            "event_number": [_alt("{0}", "Period")],
+            "heat_number": [_alt("{0}", "Time Out Time")],
+        },
+        "lanes": [
+            (
+                [_alt(f"{team} #{{0}}", f"{team} Penalty {n} Number")],
+                [_alt("{0}", f"{team} Penalty {n} Time")],
+            )
+            for team, n in penalties[:lanes]
+        ],
+    }
+
+
+# Keyed by a word from the ITF's [TEMPLATE] DESCRIPTION line
+SPORT_PROFILES = {
+    "swimming": _swimming,
+    "diving": _diving,
+    "water polo": _water_polo,
+}
+
+
+def read_itf_description(itf_path):
+    """Return the DESCRIPTION= value from an ITF's [TEMPLATE] block ('' if missing)."""
+    with open(itf_path, "r", encoding="utf-8", errors="ignore") as f:
+        for raw in f:
+            line = raw.strip()
+            if line.startswith("DESCRIPTION="):
+                return line.split("=", 1)[1]
+            if line.startswith("[FIELD"):
+                break
+    return ""
+
+
+def profile_for(itf_path, lanes=LANE_COUNT):
+    """Pick the sport profile for a template from its description (or file name)."""
+    text = (read_itf_description(itf_path) + " " + os.path.basename(itf_path)).lower()
+    for word, build in SPORT_PROFILES.items():
+        if word in text:
+            return build(lanes)
+    # "Dive" in OS2-Dive.itf does not contain "diving"
+    if "dive" in text:
+        return _diving(lanes)
+    return _swimming(lanes)
+
+
+class SportLayout:
+    """
+    A sport profile compiled against one ITF template.
+
+    `render(image)` returns every display value for a template image;
+    `update(image, offset, length)` returns only the values that depend
+    on the bytes just written at `offset`.
+    """
+
+    def __init__(self, itf_path="OS2-Swimming.itf", profile=None, lanes=LANE_COUNT):
+        self.itf_path = itf_path
+        self.field_defs = load_itf_field_defs(itf_path)
+        self.profile = profile or profile_for(itf_path, lanes)
+        self.lane_format = self.profile["lane_format"]
+
+        slices = {}
+        starts = []
+        pos = 0
+        for name, length in self.field_defs:
+            slices[name.strip()] = (pos, pos + length)
+            starts.append(pos)
+            pos += length
+        self.size = pos
+        self._starts = starts
+        # field name -> (start, end) in the template image
+        self.field_slices = slices
+
+        # key -> [(fmt, ((start, end), ...)), ...] with unknown fields dropped
+        self.extractors = {}
+        # Per field: header keys (str) and lane numbers (int) that read it
+        field_targets = [set() for _ in starts]
+
+        def compile_alts(key, alts, target):
+            compiled = []
+            for fmt, names in alts:
+                resolved = tuple(slices[n] for n in names if n in slices)
+                if len(resolved) != len(names):
+                    continue
+                compiled.append((fmt, resolved))
+                for start, _ in resolved:
+                    field_targets[bisect_right(starts, start) - 1].add(target)
+            self.extractors[key] = compiled
+
+        for key, alts in self.profile["header"].items():
+            compile_alts(key, alts, key)
+        self.lane_count = len(self.profile["lanes"])
+        self._lane_keys = {}
+        for i, (name_alts, value_alts) in enumerate(self.profile["lanes"], start=1):
+            self._lane_keys[i] = (f"lane_{i}_name", f"lane_{i}_value", f"lane_{i}")
+            compile_alts(f"lane_{i}_name", name_alts, i)
+            compile_alts(f"lane_{i}_value", value_alts, i)
+
+        self._field_targets = [tuple(targets) for targets in field_targets]
+
+    def new_image(self):
+        """A blank template image sized for this layout."""
+        return bytearray(b" " * self.size)
+
+    def _extract(self, image, key):
+        for fmt, resolved in self.extractors[key]:
+            values = [image[a:b].decode("ascii", errors="ignore").strip() for a, b in resolved]
+            if any(values):
+                return fmt.format(*values).strip()
+        return ""
+
+    def _lane(self, image, i, out):
+        name_key, value_key, key = self._lane_keys[i]
+        name = self._extract(image, name_key)
+        value = self._extract(image, value_key)
+        out[name_key] = name
+        out[value_key] = value
+        out[key] = f"{name} {value}".strip()
+
+    def render(self, image):
+        out = {"lane_format": self.lane_format}
+        for key in self.profile["header"]:
+            out[key] = self._extract(image, key)
+        for i in range(1, self.lane_count + 1):
+            self._lane(image, i, out)
+        return out
+
+    def update(self, image, offset, length):
+        """Display values affected by a write of `length` bytes at `offset`."""
+        if length <= 0 or offset >= self.size:
+            return {}
+        first = max(bisect_right(self._starts, offset) - 1, 0)
+        last = bisect_right(self._starts, offset + length - 1) - 1
+        targets = set()
+        for i in range(first, last + 1):
+            targets.update(self._field_targets[i])
+        if not targets:
+            return {}
+        out = {"lane_format": self.lane_format}
+        for target in targets:
+            if isinstance(target, int):
+                self._lane(image, target, out)
+            else:
+                out[target] = self._extract(image, target)
+        return out